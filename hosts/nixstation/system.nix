@@ -1263,9 +1263,13 @@ in {
       VOICE_PE_HERMES_KEY_FILE = "${homeDir}/.config/secrets/hermes_lore_api_server_key";
       VOICE_PE_WHISPER_MODEL = "base";
       VOICE_PE_TTS_COMMAND = "${voicePeHermesBridge}/bin/voice-pe-neutts-tts";
+      VOICE_PE_TTS_URL = "http://127.0.0.1:8799/synthesize";
       VOICE_PE_HTTP_BIND = "0.0.0.0";
       VOICE_PE_HTTP_PORT = "8798";
       VOICE_PE_HTTP_BASE = "http://192.168.7.29:8798";
+      VOICE_PE_TRACE_FILE = "${homeDir}/.local/state/voice-pe/turns.jsonl";
+      VOICE_PE_AUDIO_CACHE_DIR = "${homeDir}/.cache/voice-pe/audio";
+      VOICE_PE_TTS_VOICE = "lore-data-log-2-0-12s";
     };
   };
 
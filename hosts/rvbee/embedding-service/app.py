@@ -7,59 +7,744 @@ Model: all-MiniLM-L6-v2 (23MB, 384 dimensions, ~750 qps on CPU)
 """
 
 import os
+import copy
+import time
+import base64
+import shutil
 import asyncio
-from typing import List
-from contextlib import asynccontextmanager
+import threading
+import multiprocessing
+from typing import TYPE_CHECKING, List, Literal, Optional, Tuple, Union
+from contextlib import asynccontextmanager, contextmanager
+from concurrent.futures import ProcessPoolExecutor
 
-from fastapi import FastAPI, HTTPException
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
-from sentence_transformers import SentenceTransformer
 import uvicorn
 
-# Configuration
-MODEL_NAME = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+# torch and sentence-transformers are imported by the background loader so
+# the port is bound before the multi-second import cost is paid
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+import metrics
+from paths import EXPORT_DIR, MODEL_NAME, model_slug, pca_path
+from registry import BatchQueue, ModelRegistry
+from store import VectorStore
+
+# Configuration (MODEL_NAME and EXPORT_DIR live in paths.py)
+# torch | onnx | onnx-int8 | openvino
+BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+# Quantization config for onnx-int8: arm64 | avx2 | avx512 | avx512_vnni
+QUANT_CONFIG = os.getenv("EMBEDDING_QUANT_CONFIG", "avx2")
+# Minimum cosine similarity against PyTorch output for an exported graph
+PARITY_MIN = float(os.getenv("EMBEDDING_PARITY_MIN", "0.99"))
+PARITY_TEXTS = [
+    "hello",
+    "The quick brown fox jumps over the lazy dog.",
+    "Local embeddings keep memory lookups on the box instead of a remote API, "
+    "which matters for both latency and privacy when indexing personal notes.",
+]
 HOST = os.getenv("EMBEDDING_HOST", "127.0.0.1")
 PORT = int(os.getenv("EMBEDDING_PORT", "8000"))
+# Padded tokens per forward pass; short buckets get proportionally larger batches
+TOKEN_BUDGET = int(os.getenv("EMBEDDING_TOKEN_BUDGET", "8192"))
+LENGTH_BUCKETS = (16, 32, 64, 128, 256, 512)
+# Default overlap between document chunks, in tokens
+CHUNK_OVERLAP = 32
+# Inference worker processes; 0 encodes in the server process
+WORKERS = int(os.getenv("EMBEDDING_WORKERS", "0"))
+# Threads per worker; 0 divides the CPU cores evenly between workers
+WORKER_THREADS = int(os.getenv("EMBEDDING_WORKER_THREADS", "0"))
+# Root directory for hosted vector collections; unset disables /upsert etc.
+STORE_DIR = os.getenv("EMBEDDING_STORE_DIR", "")
+# Load from the local HF cache without hub network checks when a snapshot exists
+LOCAL_ONLY = os.getenv("EMBEDDING_LOCAL_ONLY", "1") == "1"
+# Warmup passes over one text per length bucket before reporting ready (0 disables)
+WARMUP_ROUNDS = int(os.getenv("EMBEDDING_WARMUP_ROUNDS", "2"))
+# Extra models requests may name; loaded on first use in the server process
+EXTRA_MODELS = [m.strip() for m in os.getenv("EMBEDDING_MODELS", "").split(",") if m.strip()]
+# Memory budget for extra models before idle ones are unloaded (LRU)
+MODEL_MEMORY_MB = int(os.getenv("EMBEDDING_MODEL_MEMORY_MB", "2048"))
+# Unload extra models idle for this long
+MODEL_IDLE_SECONDS = float(os.getenv("EMBEDDING_MODEL_IDLE_SECONDS", "900"))
+# Texts coalesced into one encode call by a model's batch queue
+QUEUE_MAX_TEXTS = int(os.getenv("EMBEDDING_QUEUE_MAX_TEXTS", "256"))
 
-# Global model instance
+# Global model instance (or worker pool when EMBEDDING_WORKERS > 0)
 model = None
+pool = None
+# Batch queue for MODEL_NAME, and on-demand extra models
+default_queue: Optional[BatchQueue] = None
+registry: Optional[ModelRegistry] = None
+# Effective backend per model name after export/parity fallback
+backends: dict = {}
+# Whether each hub model has a complete snapshot in the local HF cache
+local_snapshots: dict = {}
+# PCA (mean, components) per model name, loaded on first use
+projections: dict = {}
+# Embedding width per model name, recorded when the model first loads
+widths: dict = {}
+# Tokenizer copies for document chunking, so it never shares a tokenizer
+# with a concurrent encode thread
+chunk_tokenizers: dict = {}
+# Background startup progress, reported on /health
+load_state = {"stage": "starting", "error": None, "seconds": None}
+# Seconds spent tokenizing since the last reset, per encoding thread
+tokenize_clock = threading.local()
+
+REQUESTS = metrics.Counter(
+    "embedding_requests_total", "HTTP requests by endpoint and status", ("endpoint", "status")
+)
+REQUEST_SECONDS = metrics.Histogram(
+    "embedding_request_seconds", "End-to-end HTTP request latency", ("endpoint",)
+)
+STAGE_SECONDS = metrics.Histogram(
+    "embedding_stage_seconds",
+    "Time per stage: queue, tokenize, forward, search, serialize",
+    ("endpoint", "stage"),
+)
+BATCH_SIZE = metrics.Histogram(
+    "embedding_batch_size",
+    "Texts per encode call, after the batch queue merges requests",
+    ("model",),
+    metrics.BATCH_BUCKETS,
+)
+REQUEST_TEXTS = metrics.Histogram(
+    "embedding_request_texts", "Texts per request", ("endpoint",), metrics.BATCH_BUCKETS
+)
+metrics.Gauge(
+    "embedding_process_rss_bytes",
+    "Resident memory of the server and its inference workers",
+    lambda: metrics.rss_bytes()
+    + sum(metrics.rss_bytes(pid) for pid in (pool._processes if pool else {})),
+)
+store = VectorStore(STORE_DIR) if STORE_DIR else None
+
 
+class OutputOptions(BaseModel):
+    """Optional dimension reduction and compact vector encoding.
 
-class EmbedRequest(BaseModel):
+    float16 and int8 vectors are returned as base64 little-endian bytes;
+    int8 rows come with a per-vector scale (value = int8 * scale).
+    """
+    dimensions: Optional[int] = None
+    reduction: Literal["truncate", "pca"] = "truncate"
+    encoding: Literal["float32", "float16", "int8"] = "float32"
+
+
+class EmbedRequest(OutputOptions):
     text: str
     normalize: bool = True
+    model: Optional[str] = None
 
 
-class EmbedBatchRequest(BaseModel):
+class EmbedBatchRequest(OutputOptions):
     texts: List[str]
     normalize: bool = True
+    model: Optional[str] = None
 
 
 class EmbedResponse(BaseModel):
-    embedding: List[float]
+    embedding: Union[List[float], str]
     dimensions: int
     model: str
+    encoding: str = "float32"
+    scale: Optional[float] = None
 
 
 class EmbedBatchResponse(BaseModel):
-    embeddings: List[List[float]]
+    embeddings: Union[List[List[float]], List[str]]
     dimensions: int
     model: str
     count: int
+    encoding: str = "float32"
+    scales: Optional[List[float]] = None
 
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Load model on startup"""
+class DocumentRequest(OutputOptions):
+    documents: List[str]
+    normalize: bool = True
+    model: Optional[str] = None
+    # Tokens per chunk (default: the model's max sequence length) and overlap
+    # (default: CHUNK_OVERLAP, capped at a quarter of the chunk)
+    chunk_tokens: Optional[int] = None
+    overlap_tokens: Optional[int] = None
+    # Also return the normalized mean of each document's chunk vectors
+    pool: bool = False
+    include_text: bool = False
+
+
+class UpsertItem(BaseModel):
+    id: str
+    text: Optional[str] = None
+    embedding: Optional[List[float]] = None
+    metadata: dict = {}
+
+
+class UpsertRequest(BaseModel):
+    collection: str
+    items: List[UpsertItem]
+    model: Optional[str] = None
+
+
+class DeleteRequest(BaseModel):
+    collection: str
+    ids: List[str]
+
+
+class SearchRequest(BaseModel):
+    collection: str
+    query: Optional[str] = None
+    embedding: Optional[List[float]] = None
+    k: int = 10
+    model: Optional[str] = None
+
+
+class SearchHit(BaseModel):
+    id: str
+    score: float
+    metadata: dict
+
+
+class SearchResponse(BaseModel):
+    hits: List[SearchHit]
+    collection: str
+    count: int
+
+
+def count_tokenize(seconds: float) -> None:
+    tokenize_clock.seconds = getattr(tokenize_clock, "seconds", 0.0) + seconds
+
+
+def token_lengths(encoder: "SentenceTransformer", texts: List[str]) -> List[int]:
+    """Token count per text, capped at the model's max sequence length"""
+    if not texts:
+        return []
+    started = time.perf_counter()
+    encoded = encoder.tokenizer(
+        texts,
+        add_special_tokens=True,
+        truncation=True,
+        max_length=encoder.max_seq_length,
+        return_attention_mask=False,
+        return_token_type_ids=False,
+    )
+    count_tokenize(time.perf_counter() - started)
+    return [len(ids) for ids in encoded["input_ids"]]
+
+
+def encode_bucketed(
+    encoder: "SentenceTransformer", texts: List[str], normalize: bool
+) -> np.ndarray:
+    """Encode texts grouped by token length with token-budget batch sizes.
+
+    SentenceTransformer.encode already sorts by length, but it then slices
+    fixed batch_size batches, so a request of up to 32 texts is a single
+    batch padded to its longest member. Bucketing splits length classes
+    into separate forward passes sized to TOKEN_BUDGET, at the cost of an
+    extra tokenization pass; the rows are scattered back into the caller's
+    original order.
+    """
+    if len(texts) == 1:
+        return encoder.encode(
+            texts, normalize_embeddings=normalize, show_progress_bar=False
+        )
+    buckets: dict = {}
+    for index, length in enumerate(token_lengths(encoder, texts)):
+        ceiling = next((b for b in LENGTH_BUCKETS if length <= b), length)
+        buckets.setdefault(ceiling, []).append(index)
+
+    embeddings = np.empty(
+        (len(texts), encoder.get_sentence_embedding_dimension()), dtype=np.float32
+    )
+    for ceiling, indices in sorted(buckets.items()):
+        embeddings[indices] = encoder.encode(
+            [texts[i] for i in indices],
+            batch_size=max(1, TOKEN_BUDGET // ceiling),
+            normalize_embeddings=normalize,
+            show_progress_bar=False,
+        )
+    return embeddings
+
+
+def timed_tokenize(tokenize):
+    """Wrap SentenceTransformer.tokenize to accumulate into tokenize_clock"""
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return tokenize(*args, **kwargs)
+        finally:
+            count_tokenize(time.perf_counter() - started)
+    return wrapper
+
+
+def encode_timed(
+    encoder: "SentenceTransformer", texts: List[str], normalize: bool, submitted: float
+) -> Tuple[np.ndarray, dict]:
+    """encode_bucketed plus queue/tokenize/forward timings in seconds"""
+    started = time.time()
+    tokenize_clock.seconds = 0.0
+    embeddings = encode_bucketed(encoder, texts, normalize)
+    total = time.time() - started
+    return embeddings, {
+        "queue": max(0.0, started - submitted),
+        "tokenize": tokenize_clock.seconds,
+        "forward": max(0.0, total - tokenize_clock.seconds),
+    }
+
+
+def export_path(name: str, backend: str) -> str:
+    """Cache directory for a model converted for a backend"""
+    suffix = f"{backend}-{QUANT_CONFIG}" if backend == "onnx-int8" else backend
+    return os.path.join(EXPORT_DIR, f"{model_slug(name)}-{suffix}")
+
+
+def check_embedding(embedding: List[float]) -> None:
+    """Reject caller-supplied vectors that cannot be stored or searched"""
+    if not embedding:
+        raise HTTPException(status_code=400, detail="Embeddings must be non-empty")
+    if not np.isfinite(np.asarray(embedding, dtype=np.float32)).all():
+        raise HTTPException(status_code=400, detail="Embeddings must be finite")
+
+
+async def check_output(options: OutputOptions, name: str) -> None:
+    """Reject unusable reduction options before any encoding work"""
+    if options.dimensions is None:
+        return
+    if options.dimensions < 1:
+        raise HTTPException(status_code=400, detail="dimensions must be positive")
+    if options.reduction == "truncate":
+        if name not in widths:
+            # Extra models record their width as they load
+            await registry.get(name)
+        if options.dimensions > widths[name]:
+            raise HTTPException(
+                status_code=400, detail=f"{name} has {widths[name]} dimensions"
+            )
+    else:
+        if name not in projections:
+            path = pca_path(name)
+            if not os.path.exists(path):
+                raise HTTPException(
+                    status_code=400, detail=f"No PCA projection fitted for {name}"
+                )
+            with np.load(path) as data:
+                projections[name] = (data["mean"], data["components"])
+        if options.dimensions > len(projections[name][1]):
+            raise HTTPException(
+                status_code=400,
+                detail=f"PCA projection has {len(projections[name][1])} components",
+            )
+
+
+def reduce_dimensions(
+    embeddings: np.ndarray, options: OutputOptions, name: str, normalize: bool
+) -> np.ndarray:
+    """Truncate (Matryoshka-style) or PCA-project rows to options.dimensions"""
+    if options.dimensions is None:
+        return embeddings
+    if options.reduction == "pca":
+        mean, components = projections[name]
+        reduced = (embeddings - mean) @ components[: options.dimensions].T
+    else:
+        reduced = embeddings[:, : options.dimensions]
+    if normalize:
+        norms = np.linalg.norm(reduced, axis=1, keepdims=True)
+        reduced = reduced / np.maximum(norms, 1e-12)
+    return reduced.astype(np.float32, copy=False)
+
+
+def pack_vectors(
+    embeddings: np.ndarray, encoding: str
+) -> Tuple[Union[list, List[str]], Optional[List[float]]]:
+    """Rows as JSON floats, or base64 float16 / scale-quantized int8"""
+    if encoding == "float32":
+        return embeddings.tolist(), None
+    if encoding == "float16":
+        rows = embeddings.astype("<f2")
+        return [base64.b64encode(row.tobytes()).decode("ascii") for row in rows], None
+    scales = np.abs(embeddings).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    rows = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+    return [base64.b64encode(row.tobytes()).decode("ascii") for row in rows], scales.tolist()
+
+
+def parity(candidate: "SentenceTransformer", reference: "SentenceTransformer") -> float:
+    """Lowest cosine similarity between candidate and PyTorch embeddings"""
+    a = candidate.encode(PARITY_TEXTS, normalize_embeddings=True)
+    b = reference.encode(PARITY_TEXTS, normalize_embeddings=True)
+    return float(np.min(np.sum(a * b, axis=1)))
+
+
+def export_model(name: str, backend: str, path: str) -> None:
+    """Convert a model for a backend and save it to path"""
+    from sentence_transformers import (
+        SentenceTransformer,
+        export_dynamic_quantized_onnx_model,
+        export_optimized_onnx_model,
+    )
+
+    if backend == "openvino":
+        converted = SentenceTransformer(name, backend="openvino", **hub_options(name))
+        converted.save_pretrained(path)
+        return
+    converted = SentenceTransformer(name, backend="onnx", **hub_options(name))
+    converted.save_pretrained(path)
+    if backend == "onnx-int8":
+        export_dynamic_quantized_onnx_model(converted, QUANT_CONFIG, path)
+    else:
+        export_optimized_onnx_model(converted, "O3", path)
+
+
+def load_backend(path: str, backend: str) -> "SentenceTransformer":
+    """Load a previously exported model from path"""
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "openvino":
+        return SentenceTransformer(path, backend="openvino")
+    if backend == "onnx-int8":
+        file_name = f"onnx/model_qint8_{QUANT_CONFIG}.onnx"
+    else:
+        file_name = "onnx/model_O3.onnx"
+    return SentenceTransformer(
+        path, backend="onnx", model_kwargs={"file_name": file_name}
+    )
+
+
+def prepare_backend(name: str) -> str:
+    """Export and parity-check a non-torch backend if it is not cached yet.
+
+    Non-torch backends are exported once into EXPORT_DIR and checked against
+    the PyTorch model. The export is built in a ".partial" directory and
+    only moved into place once it passes, so an interrupted export is
+    redone rather than loaded. A graph that fails the check is discarded
+    and its score recorded in a ".parity-failed" marker, so later starts go
+    straight to PyTorch until the marker is removed or EMBEDDING_PARITY_MIN
+    is lowered below it. Returns the backend to load with.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if name in backends:
+        return backends[name]
+    backend = BACKEND
+    if backend not in ("torch", "onnx", "onnx-int8", "openvino"):
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+
+    path = export_path(name, backend)
+    failed_path = path + ".parity-failed"
+    if backend != "torch" and os.path.exists(failed_path):
+        with open(failed_path) as f:
+            failed_score = float(f.read())
+        if failed_score < PARITY_MIN:
+            print(
+                f"{backend} export of {name} failed parity ({failed_score:.4f}); "
+                "using torch backend"
+            )
+            backend = "torch"
+    if backend != "torch" and not os.path.isdir(path):
+        if name == MODEL_NAME:
+            set_stage("exporting")
+        partial = path + ".partial"
+        shutil.rmtree(partial, ignore_errors=True)
+        print(f"Exporting {name} for {backend} backend to {path}")
+        export_model(name, backend, partial)
+        score = parity(
+            load_backend(partial, backend), SentenceTransformer(name, **hub_options(name))
+        )
+        print(f"Parity against PyTorch: min cosine {score:.4f}")
+        if score < PARITY_MIN:
+            print(f"Parity below {PARITY_MIN}; discarding export, using torch backend")
+            shutil.rmtree(partial, ignore_errors=True)
+            with open(failed_path, "w") as f:
+                f.write(f"{score}\n")
+            backend = "torch"
+        else:
+            os.replace(partial, path)
+            if os.path.exists(failed_path):
+                os.remove(failed_path)
+    backends[name] = backend
+    return backend
+
+
+def load_model(name: str = MODEL_NAME) -> "SentenceTransformer":
+    """Load a model with the configured backend"""
+    from sentence_transformers import SentenceTransformer
+
+    backend = prepare_backend(name)
+    if name == MODEL_NAME:
+        set_stage("loading model")
+    if backend == "torch":
+        loaded = SentenceTransformer(name, **hub_options(name))
+    else:
+        loaded = load_backend(export_path(name, backend), backend)
+    loaded.tokenize = timed_tokenize(loaded.tokenize)
+    return loaded
+
+
+def load_extra_model(name: str) -> Tuple["SentenceTransformer", int]:
+    """Registry loader: warm model plus its approximate resident size"""
+    rss_before = metrics.rss_bytes()
+    loaded = load_model(name)
+    warmup(loaded)
+    widths[name] = loaded.get_sentence_embedding_dimension()
+    weights = sum(p.numel() * p.element_size() for p in loaded.parameters())
+    return loaded, max(weights, metrics.rss_bytes() - rss_before)
+
+
+def init_worker(backend: str, threads: int) -> None:
+    """Pool initializer: pin the thread count and load a warm private model"""
     global model
-    print(f"Loading embedding model: {MODEL_NAME}")
+    backends[MODEL_NAME] = backend
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    import torch
+
+    torch.set_num_threads(threads)
+    model = load_model()
+    warmup(model)
+
+
+def worker_encode(
+    texts: List[str], normalize: bool, submitted: float
+) -> Tuple[np.ndarray, dict]:
+    return encode_timed(model, texts, normalize, submitted)
+
+
+def chunk_spans(
+    encoder: "SentenceTransformer",
+    documents: List[str],
+    window: Optional[int],
+    overlap: Optional[int],
+    tokenizer=None,
+) -> List[List[Tuple[int, int, int]]]:
+    """Sliding token windows per document as (char start, char end, tokens)
+
+    Raises ValueError, before tokenizing anything, when the overlap leaves
+    no room for the window to advance.
+    """
+    tokenizer = tokenizer or encoder.tokenizer
+    limit = encoder.max_seq_length - tokenizer.num_special_tokens_to_add()
+    window = min(window or limit, limit)
+    if overlap is None:
+        overlap = min(CHUNK_OVERLAP, window // 4)
+    if overlap >= window:
+        raise ValueError(
+            f"overlap_tokens must be smaller than the chunk size ({window} tokens)"
+        )
+    step = window - overlap
+    encoded = tokenizer(
+        documents,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        return_attention_mask=False,
+        return_token_type_ids=False,
+    )
+    spans = []
+    for offsets in encoded["offset_mapping"]:
+        document = []
+        for start in range(0, len(offsets), step):
+            piece = offsets[start:start + window]
+            document.append((piece[0][0], piece[-1][1], len(piece)))
+            if start + window >= len(offsets):
+                break
+        spans.append(document)
+    return spans
+
+
+def worker_chunk(
+    documents: List[str], window: Optional[int], overlap: Optional[int]
+) -> List[List[Tuple[int, int, int]]]:
+    return chunk_spans(model, documents, window, overlap)
+
+
+def model_info() -> dict:
+    return {
+        "dimensions": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.max_seq_length,
+        "device": str(model.device),
+    }
+
+
+def thread_queue(name: str, encoder: "SentenceTransformer") -> BatchQueue:
+    """Batch queue encoding in a thread of this process"""
+    async def run(texts: List[str], normalize: bool) -> Tuple[np.ndarray, dict]:
+        BATCH_SIZE.observe(len(texts), model=name)
+        return await asyncio.to_thread(encode_timed, encoder, texts, normalize, time.time())
+    return BatchQueue(run, QUEUE_MAX_TEXTS)
+
+
+def pool_queue() -> BatchQueue:
+    """Batch queue keeping every pool worker busy with its own batch"""
+    async def run(texts: List[str], normalize: bool) -> Tuple[np.ndarray, dict]:
+        BATCH_SIZE.observe(len(texts), model=MODEL_NAME)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, worker_encode, texts, normalize, time.time())
+    return BatchQueue(run, QUEUE_MAX_TEXTS, concurrency=WORKERS)
+
+
+def check_model(name: Optional[str]) -> str:
+    """Resolve a request's model field, rejecting models not configured"""
+    if name is None or name == MODEL_NAME:
+        return MODEL_NAME
+    if name not in EXTRA_MODELS:
+        raise HTTPException(status_code=400, detail=f"Model not available: {name}")
+    return name
+
+
+async def encode(
+    texts: List[str], normalize: bool, endpoint: str, name: str = MODEL_NAME
+) -> np.ndarray:
+    """Encode through the named model's batch queue"""
+    if name == MODEL_NAME:
+        queue = default_queue
+    else:
+        queue = (await registry.get(name)).queue
+    embeddings, stages = await queue.submit(texts, normalize)
+    REQUEST_TEXTS.observe(len(texts), endpoint=endpoint)
+    for stage, seconds in stages.items():
+        STAGE_SECONDS.observe(seconds, endpoint=endpoint, stage=stage)
+    return embeddings
+
+
+async def chunk(
+    documents: List[str], window: Optional[int], overlap: Optional[int], name: str
+) -> List[List[Tuple[int, int, int]]]:
+    """Chunk documents with the named model's tokenizer"""
+    if name == MODEL_NAME and pool is not None:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, worker_chunk, documents, window, overlap)
+    encoder = model if name == MODEL_NAME else (await registry.get(name)).encoder
+    if name not in chunk_tokenizers:
+        chunk_tokenizers[name] = copy.deepcopy(encoder.tokenizer)
+    return await asyncio.to_thread(
+        chunk_spans, encoder, documents, window, overlap, chunk_tokenizers[name]
+    )
+
+
+@contextmanager
+def timed(stage: str, endpoint: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, stage=stage)
+
+
+async def start_pool() -> None:
+    """Start WORKERS inference processes and wait until each has a model.
+
+    Workers are spawned rather than forked so each gets a clean torch thread
+    pool. Each one loads a private copy of the model: only library code is
+    shared between the processes, so every worker costs the weights plus the
+    runtime (about 500 MB private memory per all-MiniLM-L6-v2 worker on the
+    torch backend).
+    """
+    global pool
+    backend = await asyncio.to_thread(prepare_backend, MODEL_NAME)
+    set_stage("starting workers")
+    threads = WORKER_THREADS or max(1, (os.cpu_count() or 1) // WORKERS)
+    pool = ProcessPoolExecutor(
+        max_workers=WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_worker,
+        initargs=(backend, threads),
+    )
+    loop = asyncio.get_running_loop()
+    infos = await asyncio.gather(
+        *(loop.run_in_executor(pool, model_info) for _ in range(WORKERS))
+    )
+    widths[MODEL_NAME] = infos[0]["dimensions"]
+    print(f"Started {WORKERS} inference workers with {threads} threads each")
+
+
+def set_stage(stage: str) -> None:
+    load_state["stage"] = stage
+    print(f"Startup: {stage}")
+
+
+def ready() -> bool:
+    return load_state["stage"] == "ready"
+
+
+def hub_options(name: str) -> dict:
+    """SentenceTransformer kwargs that skip hub checks for a cached model.
+
+    Decided per model rather than through the process-wide HF_HUB_OFFLINE,
+    so an extra model that is not cached yet can still be downloaded.
+    """
+    if not LOCAL_ONLY or os.path.isdir(name):
+        return {}
+    if name not in local_snapshots:
+        from huggingface_hub import snapshot_download
+
+        try:
+            snapshot_download(name, local_files_only=True)
+            local_snapshots[name] = True
+        except Exception:
+            print(f"No local snapshot of {name}; downloading from the hub")
+            local_snapshots[name] = False
+    return {"local_files_only": True} if local_snapshots[name] else {}
+
+
+def warmup(encoder: "SentenceTransformer") -> None:
+    """Encode one text per length bucket so tokenizer init and kernel
+    selection happen before the first real request"""
+    texts = [
+        " ".join(["hello"] * max(1, bucket - 2))
+        for bucket in LENGTH_BUCKETS
+        if bucket <= encoder.max_seq_length
+    ]
+    for _ in range(WARMUP_ROUNDS):
+        encode_bucketed(encoder, texts, True)
+        encode_bucketed(encoder, texts[:1], True)
+
+
+async def startup() -> None:
+    """Load the model (or worker pool) in the background after the port binds"""
+    global model, default_queue
+    started = time.monotonic()
+    print(f"Loading embedding model: {MODEL_NAME} ({BACKEND} backend)")
     try:
-        model = SentenceTransformer(MODEL_NAME)
-        print(f"Model loaded successfully. Dimensions: {model.get_sentence_embedding_dimension()}")
+        set_stage("importing")
+        await asyncio.to_thread(hub_options, MODEL_NAME)
+        if WORKERS > 0:
+            await start_pool()
+            default_queue = pool_queue()
+        else:
+            loaded = await asyncio.to_thread(load_model)
+            set_stage("warming up")
+            model = loaded
+            await asyncio.to_thread(warmup, model)
+            default_queue = thread_queue(MODEL_NAME, model)
+            widths[MODEL_NAME] = model.get_sentence_embedding_dimension()
+            print(f"Model loaded successfully. Dimensions: {model.get_sentence_embedding_dimension()}")
+        load_state["seconds"] = round(time.monotonic() - started, 2)
+        set_stage("ready")
     except Exception as e:
         print(f"Error loading model: {e}")
-        raise
+        load_state["error"] = str(e)
+        set_stage("failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start loading the model in the background and serve /health meanwhile"""
+    global registry
+    loader = asyncio.create_task(startup())
+    registry = ModelRegistry(
+        load_extra_model, thread_queue, MODEL_MEMORY_MB * 2**20, MODEL_IDLE_SECONDS
+    )
+    sweeper = asyncio.create_task(registry.sweep())
     yield
+    loader.cancel()
+    sweeper.cancel()
+    registry.close()
+    if default_queue is not None:
+        default_queue.close()
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
     print("Shutting down embedding service")
 
 
@@ -71,32 +756,59 @@ app = FastAPI(
 )
 
 
+@app.middleware("http")
+async def record_request(request: Request, call_next):
+    """Count requests and record end-to-end latency per route"""
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    if route is not None:
+        endpoint = route.path
+    else:
+        endpoint = "unmatched" if response.status_code == 404 else request.url.path
+    REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+    REQUESTS.inc(endpoint=endpoint, status=response.status_code)
+    return response
+
+
 @app.get("/health")
 async def health():
     """Health check endpoint"""
     return {
-        "status": "healthy",
+        "status": "failed" if load_state["error"] else "healthy" if ready() else "starting",
         "model": MODEL_NAME,
-        "loaded": model is not None
+        "backend": backends.get(MODEL_NAME, BACKEND),
+        "loaded": ready(),
+        "progress": load_state["stage"],
+        "error": load_state["error"],
+        "load_seconds": load_state["seconds"],
+        "workers": WORKERS,
+        "extra_models": registry.stats() if registry else []
     }
 
 
 @app.post("/embed", response_model=EmbedResponse)
 async def embed(request: EmbedRequest):
     """Generate embedding for a single text"""
-    if model is None:
+    if not ready():
         raise HTTPException(status_code=503, detail="Model not loaded")
+    name = check_model(request.model)
+    await check_output(request, name)
     
     try:
-        embedding = model.encode(
-            request.text,
-            normalize_embeddings=request.normalize
-        )
-        return EmbedResponse(
-            embedding=embedding.tolist(),
-            dimensions=len(embedding),
-            model=MODEL_NAME
-        )
+        embeddings = await encode([request.text], request.normalize, "/embed", name)
+        with timed("serialize", "/embed"):
+            embeddings = reduce_dimensions(embeddings, request, name, request.normalize)
+            vectors, scales = pack_vectors(embeddings, request.encoding)
+            response = {
+                "embedding": vectors[0],
+                "dimensions": embeddings.shape[1],
+                "model": name,
+                "encoding": request.encoding
+            }
+            if scales is not None:
+                response["scale"] = scales[0]
+            return JSONResponse(response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Embedding failed: {str(e)}")
 
@@ -104,41 +816,234 @@ async def embed(request: EmbedRequest):
 @app.post("/embed/batch", response_model=EmbedBatchResponse)
 async def embed_batch(request: EmbedBatchRequest):
     """Generate embeddings for multiple texts (batch processing)"""
-    if model is None:
+    if not ready():
         raise HTTPException(status_code=503, detail="Model not loaded")
     
     if len(request.texts) > 1000:
         raise HTTPException(status_code=400, detail="Batch size limited to 1000 texts")
+    name = check_model(request.model)
+    await check_output(request, name)
     
     try:
-        embeddings = model.encode(
-            request.texts,
-            normalize_embeddings=request.normalize,
-            show_progress_bar=False
-        )
-        return EmbedBatchResponse(
-            embeddings=[e.tolist() for e in embeddings],
-            dimensions=embeddings.shape[1],
-            model=MODEL_NAME,
-            count=len(request.texts)
-        )
+        embeddings = await encode(request.texts, request.normalize, "/embed/batch", name)
+        with timed("serialize", "/embed/batch"):
+            embeddings = reduce_dimensions(embeddings, request, name, request.normalize)
+            vectors, scales = pack_vectors(embeddings, request.encoding)
+            response = {
+                "embeddings": vectors,
+                "dimensions": embeddings.shape[1],
+                "model": name,
+                "count": len(request.texts),
+                "encoding": request.encoding
+            }
+            if scales is not None:
+                response["scales"] = scales
+            return JSONResponse(response)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Batch embedding failed: {str(e)}")
 
 
+@app.post("/embed/document")
+async def embed_document(request: DocumentRequest):
+    """Chunk whole documents by tokens and embed every chunk in one round trip"""
+    if not ready():
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    if len(request.documents) > 100:
+        raise HTTPException(status_code=400, detail="Limited to 100 documents")
+    if request.chunk_tokens is not None and request.chunk_tokens < 1:
+        raise HTTPException(status_code=400, detail="chunk_tokens must be positive")
+    if request.overlap_tokens is not None and request.overlap_tokens < 0:
+        raise HTTPException(status_code=400, detail="overlap_tokens must not be negative")
+    if (
+        request.chunk_tokens is not None
+        and request.overlap_tokens is not None
+        and request.overlap_tokens >= request.chunk_tokens
+    ):
+        raise HTTPException(status_code=400, detail="overlap_tokens must be smaller than chunk_tokens")
+    name = check_model(request.model)
+    await check_output(request, name)
+
+    with timed("chunk", "/embed/document"):
+        try:
+            spans = await chunk(request.documents, request.chunk_tokens, request.overlap_tokens, name)
+        except ValueError as e:
+            # The model's sequence limit can make the chunk smaller than asked
+            raise HTTPException(status_code=400, detail=str(e))
+    texts = [doc[start:end] for doc, doc_spans in zip(request.documents, spans) for start, end, _ in doc_spans]
+    if len(texts) > 4096:
+        raise HTTPException(status_code=400, detail=f"Documents produce {len(texts)} chunks; limit is 4096")
+
+    try:
+        embeddings = await encode(texts, request.normalize, "/embed/document", name)
+        with timed("serialize", "/embed/document"):
+            starts = np.cumsum([0] + [len(doc_spans) for doc_spans in spans])
+            rows = embeddings
+            if request.pool and texts:
+                # Pooled rows are always normalized, chunk rows only on request
+                means = np.stack([
+                    embeddings[start:start + len(doc_spans)].mean(axis=0)
+                    for start, doc_spans in zip(starts, spans) if doc_spans
+                ])
+                means /= np.maximum(np.linalg.norm(means, axis=1, keepdims=True), 1e-12)
+                rows = np.concatenate([embeddings, means])
+            reduced = reduce_dimensions(rows, request, name, request.normalize)
+            vectors, scales = pack_vectors(reduced, request.encoding)
+
+            documents = []
+            offset = 0
+            pooled_row = len(texts)
+            for doc, doc_spans in zip(request.documents, spans):
+                chunks = []
+                for start, end, tokens in doc_spans:
+                    item = {"start": start, "end": end, "tokens": tokens, "embedding": vectors[offset]}
+                    if scales is not None:
+                        item["scale"] = scales[offset]
+                    if request.include_text:
+                        item["text"] = doc[start:end]
+                    chunks.append(item)
+                    offset += 1
+                result = {"chunks": chunks}
+                if request.pool and doc_spans:
+                    result["embedding"] = vectors[pooled_row]
+                    if scales is not None:
+                        result["scale"] = scales[pooled_row]
+                    pooled_row += 1
+                documents.append(result)
+            return JSONResponse({
+                "documents": documents,
+                "dimensions": reduced.shape[1],
+                "model": name,
+                "count": len(texts),
+                "encoding": request.encoding
+            })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Document embedding failed: {str(e)}")
+
+
 @app.get("/info")
 async def info():
     """Get model information"""
-    if model is None:
+    if not ready():
         raise HTTPException(status_code=503, detail="Model not loaded")
     
+    if pool is not None:
+        details = await asyncio.get_running_loop().run_in_executor(pool, model_info)
+    else:
+        details = model_info()
     return {
         "model": MODEL_NAME,
-        "dimensions": model.get_sentence_embedding_dimension(),
-        "max_seq_length": model.max_seq_length,
-        "device": str(model.device)
+        "backend": backends.get(MODEL_NAME, BACKEND),
+        "workers": WORKERS,
+        "extra_models": EXTRA_MODELS,
+        **details,
+    }
+
+
+def get_collection(name: str, create: bool = False):
+    if store is None:
+        raise HTTPException(status_code=404, detail="Vector store disabled (EMBEDDING_STORE_DIR unset)")
+    try:
+        collection = store.get(name, create=create)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if collection is None:
+        raise HTTPException(status_code=404, detail=f"Unknown collection: {name}")
+    return collection
+
+
+@app.post("/upsert")
+async def upsert(request: UpsertRequest):
+    """Embed (if needed) and store items in a named collection"""
+    if len(request.items) > 1000:
+        raise HTTPException(status_code=400, detail="Batch size limited to 1000 items")
+    if not request.items:
+        return {"collection": request.collection, "added": 0, "count": 0}
+    if any((item.text is None) == (item.embedding is None) for item in request.items):
+        raise HTTPException(status_code=400, detail="Each item needs exactly one of text or embedding")
+    for item in request.items:
+        if item.embedding is not None:
+            check_embedding(item.embedding)
+
+    name = check_model(request.model)
+    collection = get_collection(request.collection, create=True)
+    pending = [i for i, item in enumerate(request.items) if item.text is not None]
+    if pending and not ready():
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    try:
+        encoded = iter(await encode([request.items[i].text for i in pending], True, "/upsert", name) if pending else [])
+        vectors = np.stack([
+            next(encoded) if item.text is not None else np.asarray(item.embedding, dtype=np.float32)
+            for item in request.items
+        ])
+        added = await asyncio.to_thread(
+            collection.upsert,
+            [item.id for item in request.items],
+            vectors,
+            [item.metadata for item in request.items],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"collection": request.collection, "added": added, "count": collection.count}
+
+
+@app.post("/delete")
+async def delete(request: DeleteRequest):
+    """Remove items from a named collection by ID"""
+    collection = get_collection(request.collection)
+    removed = await asyncio.to_thread(collection.delete, request.ids)
+    return {"collection": request.collection, "removed": removed, "count": collection.count}
+
+
+@app.post("/search", response_model=SearchResponse)
+async def search(request: SearchRequest):
+    """Top-k cosine search, embedding the query text in the same round trip"""
+    if (request.query is None) == (request.embedding is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of query or embedding")
+    if request.k < 1:
+        raise HTTPException(status_code=400, detail="k must be positive")
+
+    name = check_model(request.model)
+    collection = get_collection(request.collection)
+    if request.query is not None:
+        if not ready():
+            raise HTTPException(status_code=503, detail="Model not loaded")
+        vector = (await encode([request.query], True, "/search", name))[0]
+    else:
+        check_embedding(request.embedding)
+        vector = np.asarray(request.embedding, dtype=np.float32)
+    if collection.count and len(vector) != collection.dimensions:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Collection has {collection.dimensions} dimensions, got {len(vector)}",
+        )
+
+    with timed("search", "/search"):
+        hits = await asyncio.to_thread(collection.search, vector, request.k)
+    return SearchResponse(
+        hits=[SearchHit(id=id_, score=score, metadata=meta) for id_, score, meta in hits],
+        collection=request.collection,
+        count=collection.count,
+    )
+
+
+@app.get("/collections")
+async def collections():
+    """List hosted collections"""
+    if store is None:
+        return {"collections": []}
+    return {
+        "collections": [
+            {"name": name, "count": store.get(name).count} for name in store.names()
+        ]
     }
 
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host=HOST, port=PORT)
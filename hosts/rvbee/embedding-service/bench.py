@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Embedding Service Benchmark - load generator for /embed and /embed/batch
+
+Drives a running service (or one it starts locally with --spawn) at fixed
+concurrency and prints one JSON line per scenario with throughput,
+p50/p95/p99 latency and CPU use, so backend, batching and encoding changes
+can be compared on the same hardware.
+
+Examples:
+  ./bench.py --spawn --endpoint batch --batch-size 32 --lengths mixed
+  ./bench.py --url http://127.0.0.1:8000 --concurrency 1,4,16 --duration 20
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+import http.client
+import threading
+from typing import List, Optional
+from urllib.parse import urlparse
+
+# Small default model so --spawn runs come up in seconds
+SPAWN_MODEL = "sentence-transformers/paraphrase-MiniLM-L3-v2"
+VOCABULARY = (
+    "memory note agent lore vector search query chunk model token embed "
+    "index recall context session summary project task rvbee nixos local "
+    "service latency cpu batch request response server client cache store"
+).split()
+# Word-count ranges per named distribution: (weight, min_words, max_words)
+LENGTHS = {
+    "short": [(1, 1, 6)],
+    "medium": [(1, 20, 60)],
+    "long": [(1, 150, 250)],
+    "mixed": [(8, 1, 6), (1, 20, 60), (1, 150, 250)],
+}
+
+
+def make_text(rng: random.Random, distribution: str) -> str:
+    ranges = LENGTHS[distribution]
+    _, low, high = rng.choices(ranges, weights=[w for w, _, _ in ranges])[0]
+    return " ".join(rng.choices(VOCABULARY, k=rng.randint(low, high)))
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def process_cpu_seconds(pid: int) -> float:
+    """utime + stime of a process from /proc, 0 if unavailable"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def tree_cpu_seconds(pid: int) -> float:
+    """CPU of a process and its direct children (pool workers)"""
+    total = process_cpu_seconds(pid)
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(c) for c in f.read().split()]
+    except OSError:
+        children = []
+    return total + sum(process_cpu_seconds(child) for child in children)
+
+
+class Worker(threading.Thread):
+    """One client connection issuing requests back to back until the deadline"""
+
+    def __init__(self, url, path, make_body, deadline, counter):
+        super().__init__(daemon=True)
+        self.url = url
+        self.path = path
+        self.make_body = make_body
+        self.deadline = deadline
+        self.counter = counter
+        self.latencies: List[float] = []
+        self.texts = 0
+        self.errors = 0
+
+    def take(self) -> bool:
+        with self.counter["lock"]:
+            if self.counter["left"] <= 0:
+                return False
+            self.counter["left"] -= 1
+            return True
+
+    def run(self) -> None:
+        conn = http.client.HTTPConnection(self.url.hostname, self.url.port or 80, timeout=60)
+        while time.monotonic() < self.deadline and self.take():
+            body, count = self.make_body()
+            started = time.perf_counter()
+            try:
+                conn.request("POST", self.path, body, {"Content-Type": "application/json"})
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(self.url.hostname, self.url.port or 80, timeout=60)
+                ok = False
+            if ok:
+                self.latencies.append(time.perf_counter() - started)
+                self.texts += count
+            else:
+                self.errors += 1
+        conn.close()
+
+
+def run_scenario(args, concurrency: int, server_pid: Optional[int]) -> dict:
+    url = urlparse(args.url)
+    rng = random.Random(args.seed)
+    pool = [make_text(rng, args.lengths) for _ in range(4096)]
+    rng_lock = threading.Lock()
+
+    def make_body():
+        with rng_lock:
+            if args.endpoint == "embed":
+                return json.dumps({"text": rng.choice(pool)}), 1
+            texts = rng.choices(pool, k=args.batch_size)
+        return json.dumps({"texts": texts}), len(texts)
+
+    path = "/embed" if args.endpoint == "embed" else "/embed/batch"
+    # Warm the connection path and model before timing
+    Worker(url, path, make_body, time.monotonic() + 60,
+           {"lock": threading.Lock(), "left": args.warmup}).run()
+
+    counter = {"lock": threading.Lock(), "left": args.requests or float("inf")}
+    deadline = time.monotonic() + args.duration
+    workers = [Worker(url, path, make_body, deadline, counter)
+               for _ in range(concurrency)]
+    client_cpu = time.process_time()
+    server_cpu = tree_cpu_seconds(server_pid) if server_pid else None
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    client_cpu = time.process_time() - client_cpu
+
+    latencies = sorted(l for w in workers for l in w.latencies)
+    texts = sum(w.texts for w in workers)
+    result = {
+        "endpoint": path,
+        "concurrency": concurrency,
+        "batch_size": 1 if args.endpoint == "embed" else args.batch_size,
+        "lengths": args.lengths,
+        "seconds": round(elapsed, 3),
+        "requests": len(latencies),
+        "errors": sum(w.errors for w in workers),
+        "requests_per_sec": round(len(latencies) / elapsed, 2),
+        "texts_per_sec": round(texts / elapsed, 2),
+        "latency_ms": {
+            "mean": round(1000 * sum(latencies) / max(1, len(latencies)), 3),
+            "p50": round(1000 * percentile(latencies, 0.50), 3),
+            "p95": round(1000 * percentile(latencies, 0.95), 3),
+            "p99": round(1000 * percentile(latencies, 0.99), 3),
+        },
+        "cpu": {"client_seconds": round(client_cpu, 3)},
+    }
+    if server_pid:
+        server_cpu = tree_cpu_seconds(server_pid) - server_cpu
+        result["cpu"]["server_seconds"] = round(server_cpu, 3)
+        result["cpu"]["server_cores"] = round(server_cpu / elapsed, 2)
+    return result
+
+
+def spawn_service(args) -> subprocess.Popen:
+    """Start app.py on args.url's port and wait until /health reports loaded"""
+    url = urlparse(args.url)
+    env = dict(os.environ)
+    env.setdefault("EMBEDDING_MODEL", SPAWN_MODEL)
+    env["EMBEDDING_HOST"] = url.hostname
+    env["EMBEDDING_PORT"] = str(url.port or 80)
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    process = subprocess.Popen([sys.executable, app], env=env, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"service exited with code {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=2)
+            conn.request("GET", "/health")
+            health = json.loads(conn.getresponse().read())
+            conn.close()
+            if health.get("loaded"):
+                return process
+            if health.get("error"):
+                raise SystemExit(f"service failed to load: {health['error']}")
+        except (OSError, ValueError, http.client.HTTPException):
+            pass
+        time.sleep(0.5)
+    process.terminate()
+    raise SystemExit("service did not become ready in time")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn", action="store_true",
+                        help=f"start app.py locally (EMBEDDING_MODEL defaults to {SPAWN_MODEL})")
+    parser.add_argument("--pid", type=int, help="server PID for CPU accounting when not spawning")
+    parser.add_argument("--endpoint", choices=("embed", "batch"), default="embed")
+    parser.add_argument("--concurrency", default="1,4,16",
+                        help="comma-separated client connection counts, one scenario each")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--lengths", choices=sorted(LENGTHS), default="mixed")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--requests", type=int, default=0, help="stop after N requests (0: duration only)")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed requests before each scenario")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--startup-timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    process = spawn_service(args) if args.spawn else None
+    server_pid = process.pid if process else args.pid
+    try:
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            print(json.dumps(run_scenario(args, concurrency, server_pid)), flush=True)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
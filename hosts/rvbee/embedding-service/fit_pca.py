@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Fit PCA Projection - dimension reduction for the embedding service
+
+Embeds a sample corpus (one text per line) through a running service, fits
+a PCA projection on part of it and stores it where app.py looks for it
+(EMBEDDING_EXPORT_DIR/<model>-pca.npz). The held-out part is used to
+measure recall@k against full float32 vectors for truncation, PCA and the
+float16/int8 output encodings, printed as one JSON report.
+
+Example:
+  ./fit_pca.py --corpus notes.txt --dims 64,128,192,256
+"""
+
+import os
+import json
+import random
+import argparse
+import urllib.request
+from typing import List
+
+import numpy as np
+
+from paths import MODEL_NAME, pca_path
+
+
+def embed_corpus(url: str, model: str, texts: List[str], batch_size: int = 256) -> np.ndarray:
+    rows = []
+    for start in range(0, len(texts), batch_size):
+        body = json.dumps({"texts": texts[start:start + batch_size], "model": model}).encode()
+        request = urllib.request.Request(
+            f"{url.rstrip('/')}/embed/batch", body, {"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=600) as response:
+            rows.extend(json.load(response)["embeddings"])
+    return np.asarray(rows, dtype=np.float32)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Neighbour indices per query row, excluding the query itself"""
+    scores = vectors[queries] @ vectors.T
+    scores[np.arange(len(queries)), queries] = -np.inf
+    return np.argpartition(-scores, k, axis=1)[:, :k]
+
+
+def recall(truth: np.ndarray, found: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(t) & set(f)) / k for t, f in zip(truth, found)]))
+
+
+def quantize_int8(vectors: np.ndarray) -> np.ndarray:
+    """Round-trip through the service's per-vector int8 encoding"""
+    scales = np.abs(vectors).max(axis=1, keepdims=True) / 127.0
+    scales[scales == 0] = 1.0
+    return np.clip(np.rint(vectors / scales), -127, 127) * scales
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--corpus", required=True, help="text file, one document per line")
+    parser.add_argument("--dims", default="64,128,192,256", help="dimensions to evaluate")
+    parser.add_argument("--holdout", type=float, default=0.2, help="fraction kept for evaluation")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="projection path (default: where app.py loads it)")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        texts = [line.strip() for line in f if line.strip()]
+    random.Random(args.seed).shuffle(texts)
+    vectors = embed_corpus(args.url, args.model, texts)
+    split = int(len(vectors) * (1 - args.holdout))
+    train, held_out = vectors[:split], vectors[split:]
+    if len(held_out) <= args.k:
+        raise SystemExit("corpus too small: held-out part must exceed k")
+
+    mean = train.mean(axis=0)
+    _, singular, components = np.linalg.svd(train - mean, full_matrices=False)
+    variance = singular ** 2 / np.sum(singular ** 2)
+    output = args.output or pca_path(args.model)
+    # The export directory only exists yet if a non-torch backend was exported
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    np.savez(output, mean=mean.astype(np.float32), components=components.astype(np.float32))
+
+    rng = np.random.default_rng(args.seed)
+    queries = rng.choice(len(held_out), size=min(args.queries, len(held_out)), replace=False)
+    full = normalize(held_out)
+    truth = top_k(full, queries, args.k)
+    report = {
+        "model": args.model,
+        "projection": output,
+        "train": len(train),
+        "held_out": len(held_out),
+        "k": args.k,
+        "full_dimensions": held_out.shape[1],
+        "float16_recall": recall(truth, top_k(normalize(full.astype(np.float16).astype(np.float32)), queries, args.k)),
+        "int8_recall": recall(truth, top_k(normalize(quantize_int8(full)), queries, args.k)),
+        "reductions": [],
+    }
+    for dims in (int(d) for d in args.dims.split(",")):
+        if dims >= held_out.shape[1]:
+            continue
+        projected = (held_out - mean) @ components[:dims].T
+        report["reductions"].append({
+            "dimensions": dims,
+            "truncate_recall": recall(truth, top_k(normalize(held_out[:, :dims]), queries, args.k)),
+            "pca_recall": recall(truth, top_k(normalize(projected), queries, args.k)),
+            "pca_explained_variance": float(variance[:dims].sum()),
+        })
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
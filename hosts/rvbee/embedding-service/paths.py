@@ -0,0 +1,22 @@
+"""
+Model Paths - where the embedding service keeps per-model artifacts
+
+Free of heavy imports so offline tools such as fit_pca.py can locate the
+files app.py reads without loading FastAPI, the metrics registry or the
+vector store.
+"""
+
+import os
+import re
+
+MODEL_NAME = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EXPORT_DIR = os.getenv("EMBEDDING_EXPORT_DIR", "/var/cache/embedding-service/exports")
+
+
+def model_slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "--", name)
+
+
+def pca_path(name: str) -> str:
+    """Fitted PCA projection for a model, written by fit_pca.py"""
+    return os.path.join(EXPORT_DIR, f"{model_slug(name)}-pca.npz")
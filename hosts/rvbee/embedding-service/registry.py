@@ -0,0 +1,190 @@
+"""
+Model Registry - lazily loaded embedding models with per-model batch queues
+
+Every hosted model gets a BatchQueue that coalesces concurrent requests into
+shared encode calls. Extra models are loaded on first use and unloaded
+least-recently-used first when the registry exceeds its memory budget, or
+after sitting idle for idle_seconds.
+"""
+
+import gc
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+import numpy as np
+
+# run(texts, normalize) -> (embeddings, stage timings in seconds)
+EncodeFn = Callable[[List[str], bool], Awaitable[Tuple[np.ndarray, dict]]]
+
+
+class BatchQueue:
+    """Coalesce concurrent encode requests for one model into shared batches"""
+
+    def __init__(self, run: EncodeFn, max_texts: int, concurrency: int = 1):
+        self.run = run
+        self.max_texts = max_texts
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.busy = 0
+        self.runners = [asyncio.create_task(self._runner()) for _ in range(concurrency)]
+
+    @property
+    def idle(self) -> bool:
+        return self.busy == 0 and self.queue.empty()
+
+    async def submit(self, texts: List[str], normalize: bool) -> Tuple[np.ndarray, dict]:
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((texts, normalize, time.time(), future))
+        return await future
+
+    def _take_batch(self, first: tuple) -> List[tuple]:
+        batch = [first]
+        total = len(first[0])
+        while total < self.max_texts and not self.queue.empty():
+            item = self.queue.get_nowait()
+            batch.append(item)
+            total += len(item[0])
+        return batch
+
+    async def _runner(self) -> None:
+        while True:
+            batch = self._take_batch(await self.queue.get())
+            self.busy += 1
+            try:
+                for normalize in (True, False):
+                    group = [item for item in batch if item[1] == normalize]
+                    if group:
+                        await self._encode_group(group, normalize)
+            finally:
+                self.busy -= 1
+
+    async def _encode_group(self, group: List[tuple], normalize: bool) -> None:
+        started = time.time()
+        try:
+            embeddings, stages = await self.run(
+                [text for texts, _, _, _ in group for text in texts], normalize
+            )
+        except Exception as e:
+            for _, _, _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        offset = 0
+        for texts, _, submitted, future in group:
+            if not future.done():
+                waited = dict(stages)
+                waited["queue"] = stages.get("queue", 0.0) + started - submitted
+                future.set_result((embeddings[offset:offset + len(texts)], waited))
+            offset += len(texts)
+
+    def close(self) -> None:
+        for runner in self.runners:
+            runner.cancel()
+        while not self.queue.empty():
+            _, _, _, future = self.queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("model unloaded"))
+
+
+class HostedModel:
+    def __init__(self, name: str, encoder: Any, size: int, queue: BatchQueue):
+        self.name = name
+        self.encoder = encoder
+        self.size = size
+        self.queue = queue
+        self.last_used = time.monotonic()
+
+
+class ModelRegistry:
+    """Lazily loaded extra models under a shared memory budget.
+
+    load(name) runs in a worker thread and returns (encoder, size in bytes);
+    make_queue(name, encoder) builds the model's BatchQueue on the event loop.
+    """
+
+    def __init__(
+        self,
+        load: Callable[[str], Tuple[Any, int]],
+        make_queue: Callable[[str, Any], BatchQueue],
+        budget_bytes: int,
+        idle_seconds: float,
+    ):
+        self.load = load
+        self.make_queue = make_queue
+        self.budget_bytes = budget_bytes
+        self.idle_seconds = idle_seconds
+        self.models: Dict[str, HostedModel] = {}
+        self.loading: Dict[str, asyncio.Future] = {}
+
+    async def get(self, name: str) -> HostedModel:
+        hosted = self.models.get(name)
+        if hosted is None:
+            pending = self.loading.get(name)
+            if pending is None:
+                pending = asyncio.ensure_future(self._load(name))
+                self.loading[name] = pending
+            hosted = await asyncio.shield(pending)
+        hosted.last_used = time.monotonic()
+        return hosted
+
+    async def _load(self, name: str) -> HostedModel:
+        try:
+            print(f"Loading embedding model on demand: {name}")
+            encoder, size = await asyncio.to_thread(self.load, name)
+            hosted = HostedModel(name, encoder, size, self.make_queue(name, encoder))
+            self.models[name] = hosted
+            print(f"Model {name} loaded ({size / 2**20:.0f} MiB)")
+            self._evict(keep=name)
+            return hosted
+        finally:
+            self.loading.pop(name, None)
+
+    def _used_bytes(self) -> int:
+        return sum(hosted.size for hosted in self.models.values())
+
+    def _evict(self, keep: str) -> None:
+        """Unload idle models, least recently used first, until within budget"""
+        candidates = sorted(
+            (h for h in self.models.values() if h.name != keep and h.queue.idle),
+            key=lambda h: h.last_used,
+        )
+        for hosted in candidates:
+            if self._used_bytes() <= self.budget_bytes:
+                break
+            self.unload(hosted.name, "memory budget")
+        if self._used_bytes() > self.budget_bytes:
+            print(f"Model memory {self._used_bytes() / 2**20:.0f} MiB exceeds budget; no idle model to unload")
+
+    def unload(self, name: str, reason: str) -> None:
+        hosted = self.models.pop(name, None)
+        if hosted is None:
+            return
+        hosted.queue.close()
+        hosted.encoder = None
+        gc.collect()
+        print(f"Unloaded model {name} ({reason})")
+
+    async def sweep(self) -> None:
+        """Periodically unload models idle for longer than idle_seconds"""
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_seconds / 4))
+            now = time.monotonic()
+            for hosted in list(self.models.values()):
+                if hosted.queue.idle and now - hosted.last_used > self.idle_seconds:
+                    self.unload(hosted.name, "idle")
+
+    def close(self) -> None:
+        for name in list(self.models):
+            self.unload(name, "shutdown")
+
+    def stats(self) -> List[dict]:
+        now = time.monotonic()
+        return [
+            {
+                "model": hosted.name,
+                "size_bytes": hosted.size,
+                "idle_seconds": round(now - hosted.last_used, 1),
+                "queued": hosted.queue.queue.qsize(),
+            }
+            for hosted in self.models.values()
+        ]
@@ -0,0 +1,323 @@
+"""
+Vector Store - named embedding collections for the embedding service
+
+Each collection lives in its own directory under the store root:
+  vectors.f32  float32 matrix (capacity x dimensions), memory-mapped
+  index.json   snapshot: dimensions, then ID and metadata per row (null
+               for free rows)
+  log.jsonl    row writes since the snapshot, one JSON object per line;
+               folded into a new snapshot once it outgrows the row count
+
+Vectors are L2-normalized on insert so cosine similarity is a plain
+matmul. Rows never move: a delete frees its row for the next insert, so
+row numbers double as stable hnswlib labels. Collections at or above
+HNSW_MIN rows build an hnswlib index in the background when hnswlib is
+installed, and are searched exactly until it is ready.
+
+Collection methods block on file I/O and take the collection's lock, so
+the service calls them from worker threads.
+"""
+
+import os
+import json
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+# Collections with at least this many rows are searched through HNSW
+HNSW_MIN = int(os.getenv("EMBEDDING_HNSW_MIN", "50000"))
+INITIAL_CAPACITY = 1024
+# Log entries tolerated beyond the row count before compacting
+COMPACT_MIN = 1000
+# Rows copied out of the memmap per add_items call while building
+BUILD_CHUNK = 10000
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def add_to_index(index, rows: List[int], vectors: np.ndarray) -> None:
+    """add_items with room made first; re-adding a deleted label revives it"""
+    needed = index.get_current_count() + len(rows)
+    if needed > index.get_max_elements():
+        index.resize_index(max(needed, 2 * index.get_max_elements()))
+    index.add_items(vectors, rows)
+
+
+class Collection:
+    """One named collection backed by a memory-mapped float32 matrix"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.dimensions = 0
+        # Per row; None marks a free row
+        self.ids: List[Optional[str]] = []
+        self.metadata: List[Optional[dict]] = []
+        self.rows: Dict[str, int] = {}
+        self.free: List[int] = []
+        self.logged = 0
+        self.vectors: Optional[np.memmap] = None
+        self.hnsw = None
+        # Writes made while an index builds, replayed onto it; None when idle
+        self.building: Optional[list] = None
+        index_path = os.path.join(path, "index.json")
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                index = json.load(f)
+            self.dimensions = index["dimensions"]
+            self.ids = index["ids"]
+            self.metadata = index["metadata"]
+            self._replay()
+            self.rows = {id_: row for row, id_ in enumerate(self.ids) if id_ is not None}
+            self.free = [row for row, id_ in enumerate(self.ids) if id_ is None]
+            self._open()
+
+    @property
+    def count(self) -> int:
+        return len(self.rows)
+
+    def _vectors_path(self) -> str:
+        return os.path.join(self.path, "vectors.f32")
+
+    def _log_path(self) -> str:
+        return os.path.join(self.path, "log.jsonl")
+
+    def _open(self) -> None:
+        size = os.path.getsize(self._vectors_path())
+        capacity = size // (4 * self.dimensions)
+        self.vectors = np.memmap(
+            self._vectors_path(), dtype=np.float32, mode="r+",
+            shape=(capacity, self.dimensions),
+        )
+
+    def _reserve(self, rows: int) -> None:
+        """Grow the backing file so at least `rows` rows fit"""
+        capacity = 0 if self.vectors is None else self.vectors.shape[0]
+        if rows <= capacity:
+            return
+        capacity = max(capacity * 2, rows, INITIAL_CAPACITY)
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.vectors = None
+        with open(self._vectors_path(), "ab") as f:
+            f.truncate(capacity * self.dimensions * 4)
+        self._open()
+
+    def _replay(self) -> None:
+        """Apply log.jsonl on top of the snapshot just loaded"""
+        if not os.path.exists(self._log_path()):
+            return
+        with open(self._log_path()) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash mid-append
+                    break
+                row = entry["row"]
+                while len(self.ids) <= row:
+                    self.ids.append(None)
+                    self.metadata.append(None)
+                self.ids[row] = entry.get("id")
+                self.metadata[row] = entry.get("metadata")
+                self.logged += 1
+
+    def _snapshot(self) -> None:
+        """Write index.json from memory and empty the log"""
+        index_path = os.path.join(self.path, "index.json")
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"dimensions": self.dimensions, "ids": self.ids, "metadata": self.metadata},
+                f,
+            )
+        os.replace(tmp_path, index_path)
+        # Entries left behind by a crash here only repeat what the snapshot holds
+        open(self._log_path(), "w").close()
+        self.logged = 0
+
+    def _append(self, rows: List[int]) -> None:
+        """Log the current state of `rows`, compacting once the log is long"""
+        self.vectors.flush()
+        with open(self._log_path(), "a") as f:
+            for row in rows:
+                entry = {"row": row}
+                if self.ids[row] is not None:
+                    entry.update(id=self.ids[row], metadata=self.metadata[row])
+                f.write(json.dumps(entry) + "\n")
+        self.logged += len(rows)
+        if self.logged > max(COMPACT_MIN, len(self.ids)):
+            self._snapshot()
+
+    def upsert(self, ids: List[str], vectors: np.ndarray, metadata: List[dict]) -> int:
+        """Insert or overwrite rows; returns the number of new IDs"""
+        if vectors.ndim != 2 or vectors.shape[1] == 0:
+            raise ValueError("Vectors must be non-empty")
+        if vectors.shape[0] != len(ids):
+            raise ValueError(f"Got {vectors.shape[0]} vectors for {len(ids)} IDs")
+        with self.lock:
+            created = self.dimensions == 0
+            if created:
+                self.dimensions = vectors.shape[1]
+                os.makedirs(self.path, exist_ok=True)
+            elif vectors.shape[1] != self.dimensions:
+                raise ValueError(
+                    f"Collection has {self.dimensions} dimensions, got {vectors.shape[1]}"
+                )
+            vectors = normalize_rows(vectors.astype(np.float32, copy=False))
+
+            # Make room before touching the tables so a failed grow leaves
+            # no IDs pointing at rows that were never written
+            new = [id_ for id_ in dict.fromkeys(ids) if id_ not in self.rows]
+            try:
+                self._reserve(len(self.ids) + max(0, len(new) - len(self.free)))
+            except BaseException:
+                if created:
+                    self.dimensions = 0
+                raise
+
+            added = 0
+            # Row -> position in the request; a repeated ID keeps its last vector
+            latest: Dict[int, int] = {}
+            for i, (id_, meta) in enumerate(zip(ids, metadata)):
+                row = self.rows.get(id_)
+                if row is None:
+                    if self.free:
+                        row = self.free.pop()
+                    else:
+                        row = len(self.ids)
+                        self.ids.append(None)
+                        self.metadata.append(None)
+                    self.ids[row] = id_
+                    self.rows[id_] = row
+                    added += 1
+                self.metadata[row] = meta
+                latest[row] = i
+
+            rows = list(latest)
+            vectors = vectors[list(latest.values())]
+            self.vectors[rows] = vectors
+            if self.building is not None:
+                self.building.append((rows, vectors))
+            if self.hnsw is not None:
+                add_to_index(self.hnsw, rows, vectors)
+            if created:
+                # names() lists collections by their index.json
+                self._snapshot()
+            self._append(rows)
+            return added
+
+    def delete(self, ids: List[str]) -> int:
+        """Remove rows by ID, freeing them for reuse"""
+        with self.lock:
+            rows = []
+            for id_ in ids:
+                row = self.rows.pop(id_, None)
+                if row is None:
+                    continue
+                self.ids[row] = None
+                self.metadata[row] = None
+                self.free.append(row)
+                rows.append(row)
+            if rows:
+                if self.building is not None:
+                    self.building.append((rows, None))
+                if self.hnsw is not None:
+                    for row in rows:
+                        self.hnsw.mark_deleted(row)
+                self._append(rows)
+            return len(rows)
+
+    def _build_hnsw(self, rows: List[int], vectors: np.memmap) -> None:
+        """Index `rows` off the lock, then catch up on writes made meanwhile"""
+        try:
+            index = hnswlib.Index(space="ip", dim=self.dimensions)
+            index.init_index(max_elements=max(len(rows), INITIAL_CAPACITY), ef_construction=200, M=16)
+            for start in range(0, len(rows), BUILD_CHUNK):
+                chunk = rows[start:start + BUILD_CHUNK]
+                index.add_items(vectors[chunk], chunk)
+            with self.lock:
+                for changed, written in self.building:
+                    if written is None:
+                        for row in changed:
+                            index.mark_deleted(row)
+                    else:
+                        add_to_index(index, changed, written)
+                self.hnsw = index
+                self.building = None
+        except Exception as e:
+            print(f"HNSW build failed for {self.path}: {e}")
+            with self.lock:
+                self.building = None
+
+    def search(self, query: np.ndarray, k: int) -> List[tuple]:
+        """Top-k (id, score, metadata) by cosine similarity"""
+        with self.lock:
+            k = min(k, self.count)
+            if k == 0:
+                return []
+            query = normalize_rows(query.reshape(1, -1).astype(np.float32, copy=False))[0]
+
+            if (hnswlib is not None and self.hnsw is None and self.building is None
+                    and self.count >= HNSW_MIN):
+                self.building = []
+                threading.Thread(
+                    target=self._build_hnsw,
+                    args=(list(self.rows.values()), self.vectors),
+                    name=f"hnsw-{os.path.basename(self.path)}",
+                    daemon=True,
+                ).start()
+
+            if self.hnsw is not None:
+                self.hnsw.set_ef(max(k * 2, 64))
+                labels, distances = self.hnsw.knn_query(query, k=k)
+                top = labels[0]
+                scores = 1.0 - distances[0]
+            else:
+                all_scores = self.vectors[: len(self.ids)] @ query
+                if self.free:
+                    all_scores[self.free] = -np.inf
+                top = np.argpartition(-all_scores, k - 1)[:k]
+                top = top[np.argsort(-all_scores[top])]
+                scores = all_scores[top]
+
+            return [
+                (self.ids[row], float(score), self.metadata[row])
+                for row, score in zip(top, scores)
+            ]
+
+
+class VectorStore:
+    """Named collections under one root directory"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.collections: Dict[str, Collection] = {}
+        os.makedirs(root, exist_ok=True)
+
+    def get(self, name: str, create: bool = False) -> Optional[Collection]:
+        if not name or not all(c.isalnum() or c in "-_." for c in name) or name.startswith("."):
+            raise ValueError(f"Invalid collection name: {name!r}")
+        collection = self.collections.get(name)
+        if collection is None:
+            path = os.path.join(self.root, name)
+            if not create and not os.path.isdir(path):
+                return None
+            collection = Collection(path)
+            self.collections[name] = collection
+        return collection
+
+    def names(self) -> List[str]:
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, name, "index.json"))
+        )
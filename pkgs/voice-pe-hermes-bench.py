@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""Offline end-to-end latency benchmark for the Voice PE Hermes bridge.
+
+Drives the real VoiceHermesBridge without a device or a live Hermes:
+
+* a fake ESPHome client replays PCM into the bridge and, like the device,
+  fetches each announcement over HTTP and "plays" it for its real duration;
+* a local stub serves the Hermes runs API, streaming a fixed reply as SSE at
+  a configurable token rate, plus a NeuTTS-style /synthesize endpoint that
+  renders a tone whose length follows the text at a configurable TTS speed.
+
+Each turn reports time to first audio (end of speech to the first audio
+byte reaching the device), the gaps between sentences and the total turn
+time; the summary adds p50/p95 over all runs and the bridge's own span
+breakdown.  Arguments the benchmark does not know are passed to the bridge,
+so chunking, pipelining and encoding options can be compared directly:
+
+  voice-pe-hermes-bench --runs 20 --token-rate 15 --tts-rate 60
+  voice-pe-hermes-bench --runs 20 --stream-announcements --tts-lookahead 3
+  voice-pe-hermes-bench --audio question.wav --stt-step 1.0
+  voice-pe-hermes-bench --runs 20 --audio-cache-memory 32
+  voice-pe-hermes-bench --runs 10 --devices 3 --tts-workers 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import io
+import json
+import logging
+import os
+import re
+import shlex
+import socket
+import sys
+import time
+import wave
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import httpx
+import numpy as np
+import soundfile
+
+
+DEFAULT_REPLY = (
+    "The studio lights are off and the heating is set to nineteen degrees. "
+    "Your next meeting starts at half past two, with the design review after it. "
+    "I also moved the backup window to tonight, so the workstation may be busy "
+    "for an hour after midnight. Anything else?"
+)
+SPEECH_CHARS_PER_SECOND = 14.0
+STUB_TTS_RATE = 24_000
+
+
+def load_bridge() -> Any:
+    # The Nix wrapper points at the packaged bridge; a checkout uses the sibling.
+    path = Path(
+        os.environ.get("VOICE_PE_BRIDGE_SOURCE")
+        or Path(__file__).with_name("voice-pe-hermes-bridge.py")
+    )
+    spec = importlib.util.spec_from_file_location("voice_pe_hermes_bridge", path)
+    if spec is None or spec.loader is None:
+        raise SystemExit(f"cannot load bridge from {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def tone_wav(seconds: float, rate: int = STUB_TTS_RATE) -> bytes:
+    """A quiet 16-bit mono tone standing in for synthesized speech."""
+    samples = np.arange(max(1, int(seconds * rate)))
+    audio = (0.1 * 32767 * np.sin(2 * np.pi * 220 * samples / rate)).astype("<i2")
+    output = io.BytesIO()
+    with wave.open(output, "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(rate)
+        file.writeframes(audio.tobytes())
+    return output.getvalue()
+
+
+def audio_seconds(data: bytes) -> float:
+    audio, rate = soundfile.read(io.BytesIO(data), dtype="int16", always_2d=True)
+    return len(audio) / rate
+
+
+def read_pcm(path: str) -> bytes:
+    with wave.open(path, "rb") as file:
+        if (file.getframerate(), file.getsampwidth(), file.getnchannels()) != (16_000, 2, 1):
+            raise SystemExit(f"{path}: expected 16 kHz 16-bit mono WAV")
+        return file.readframes(file.getnframes())
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class StubServer:
+    """Hermes runs API and a /synthesize TTS endpoint on one local port."""
+
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.reply = args.reply
+        self.tokens = re.findall(r"\S+\s*", args.reply)
+        self.token_rate = args.token_rate
+        self.first_token_delay = args.first_token_delay
+        self.tts_rate = args.tts_rate
+        self.runs = 0
+        self.server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        return f"http://127.0.0.1:{port}"
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while (line := await reader.readline()).strip():
+                method, target, _version = line.decode("ascii").split()
+                headers: dict[str, str] = {}
+                while (header := await reader.readline()).strip():
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+                if not await self._route(writer, method, target, body):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _send(writer: asyncio.StreamWriter, content_type: str, body: bytes) -> None:
+        writer.write(
+            f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+
+    async def _route(
+        self, writer: asyncio.StreamWriter, method: str, target: str, body: bytes
+    ) -> bool:
+        """Answer one request; False when the connection should close."""
+        if method == "POST" and target == "/v1/runs":
+            self.runs += 1
+            self._send(writer, "application/json", json.dumps({"run_id": f"bench-{self.runs}"}).encode())
+        elif method == "GET" and target.startswith("/v1/runs/") and target.endswith("/events"):
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n"
+            )
+            await asyncio.sleep(self.first_token_delay)
+            for token in self.tokens:
+                event = {"event": "message.delta", "delta": token}
+                writer.write(f"data: {json.dumps(event)}\n\n".encode())
+                await writer.drain()
+                await asyncio.sleep(1 / self.token_rate)
+            event = {"event": "run.completed", "output": self.reply}
+            writer.write(f"data: {json.dumps(event)}\n\n".encode())
+            await writer.drain()
+            return False
+        elif method == "POST" and target == "/synthesize":
+            text = str(json.loads(body).get("text") or "")
+            await asyncio.sleep(len(text) / self.tts_rate)
+            self._send(writer, "audio/wav", tone_wav(len(text) / SPEECH_CHARS_PER_SECOND))
+        else:
+            # Warm-up pings, run stops and anything else.
+            self._send(writer, "application/json", b"{}")
+        await writer.drain()
+        return True
+
+
+class FakeVoicePE:
+    """Stands in for aioesphomeapi.APIClient during a benchmark turn.
+
+    Announcements are fetched over HTTP like the device does; playback
+    starts with the first byte and lasts as long as the decoded audio.
+    """
+
+    def __init__(self) -> None:
+        self.http = httpx.AsyncClient(timeout=httpx.Timeout(300.0))
+        self.events: list[tuple[float, Any, Any]] = []
+        self.plays: list[tuple[float, float]] = []
+
+    def reset(self) -> None:
+        self.events.clear()
+        self.plays.clear()
+
+    def send_voice_assistant_event(self, event: Any, data: Any) -> None:
+        self.events.append((time.monotonic(), event, data))
+
+    async def send_voice_assistant_announcement_await_response(
+        self, media_url: str, timeout: float, text: str
+    ) -> SimpleNamespace:
+        del timeout, text
+        started: float | None = None
+        data = bytearray()
+        async with self.http.stream("GET", media_url) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                if started is None:
+                    started = time.monotonic()
+                data.extend(chunk)
+        started = started or time.monotonic()
+        ended = max(time.monotonic(), started + audio_seconds(bytes(data)))
+        await asyncio.sleep(max(0.0, ended - time.monotonic()))
+        self.plays.append((started, ended))
+        return SimpleNamespace(success=True)
+
+    async def disconnect(self, force: bool = False) -> None:
+        del force
+        await self.http.aclose()
+
+
+async def run_turn(
+    device: Any, fake: FakeVoicePE, pcm: bytes, speed: float, error_event: Any
+) -> dict[str, Any]:
+    fake.reset()
+    await device.handle_start("bench", 0, None, None)
+    step = 32_000 // 10  # 100 ms of 16 kHz 16-bit audio per packet
+    for offset in range(0, len(pcm), step):
+        await device.handle_audio(pcm[offset:offset + step], None)
+        if speed > 0:
+            await asyncio.sleep(0.1 / speed)
+    speech_end = time.monotonic()
+    await device.handle_stop(False)
+    if device.active_turn is not None:
+        await device.active_turn
+    plays = fake.plays
+    failed = any(event == error_event for _, event, _ in fake.events)
+    return {
+        "ok": bool(plays) and not failed,
+        "sentences": len(plays),
+        "first_audio": round(plays[0][0] - speech_end, 4) if plays else None,
+        "gaps": [round(b[0] - a[1], 4) for a, b in zip(plays, plays[1:])],
+        "total": round((plays[-1][1] if plays else time.monotonic()) - speech_end, 4),
+    }
+
+
+def summarize(values: list[float], percentile: Any) -> dict[str, float]:
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    return {
+        "mean": round(sum(ordered) / len(ordered), 4),
+        "p50": round(percentile(ordered, 0.50), 4),
+        "p95": round(percentile(ordered, 0.95), 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+async def benchmark(args: argparse.Namespace, bridge_argv: list[str]) -> dict[str, Any]:
+    module = load_bridge()
+    stub = StubServer(args)
+    base = await stub.start()
+    port = free_port()
+    if args.tts == "http":
+        tts = ["--tts-url", f"{base}/synthesize"]
+    else:
+        command = [sys.executable, str(Path(__file__).resolve()), "--stub-tts", str(args.tts_rate)]
+        tts = ["--tts-command", shlex.join(command)]
+    bridge_args = module.parse_args(
+        [
+            "--voice-pe-key", "bench",
+            "--device", ",".join(f"bench-{index}" for index in range(args.devices)),
+            "--hermes-key", "bench",
+            "--hermes-url", base,
+            "--hermes-keepalive", "0",
+            "--http-bind", "127.0.0.1",
+            "--http-port", str(port),
+            "--http-base", f"http://127.0.0.1:{port}",
+            "--trace-file", "",
+            # Every run repeats one reply; cached audio would hide the TTS cost.
+            "--audio-cache-dir", "",
+            "--audio-cache-memory", "0",
+            *tts,
+            *bridge_argv,
+            # Without recorded audio there is nothing for streaming STT to do.
+            *([] if args.audio else ["--stt-step", "0"]),
+        ]
+    )
+    bridge = module.VoiceHermesBridge(bridge_args)
+    fakes = [FakeVoicePE() for _ in bridge.devices]
+    for device, fake in zip(bridge.devices, fakes):
+        device.client = fake
+    await bridge.announcement.start()
+    if args.audio:
+        pcm = read_pcm(args.audio)
+        await bridge.preload_whisper()
+    else:
+        pcm = bytes(int(16_000 * 2 * 1.5))
+        loaded = asyncio.get_running_loop().create_future()
+        loaded.set_result(None)
+        bridge.preload_whisper = lambda: loaded
+        bridge.transcribe = lambda _pcm: args.transcript
+
+    error_event = module.VoiceAssistantEventType.VOICE_ASSISTANT_ERROR
+    turns = []
+    try:
+        for index in range(args.warmup + args.runs):
+            # With several devices every run is one simultaneous turn each.
+            concurrent = await asyncio.gather(
+                *(
+                    run_turn(device, fake, pcm, args.audio_speed, error_event)
+                    for device, fake in zip(bridge.devices, fakes)
+                )
+            )
+            if index < args.warmup:
+                bridge.trace_stats.turns.clear()
+                continue
+            turns.extend(concurrent)
+            if args.verbose:
+                for turn in concurrent:
+                    print(json.dumps(turn), flush=True)
+    finally:
+        await bridge.close()
+        await stub.close()
+
+    completed = [turn for turn in turns if turn["ok"]]
+    return {
+        "runs": len(turns),
+        "devices": args.devices,
+        "failed": len(turns) - len(completed),
+        "token_rate": args.token_rate,
+        "tts_rate": args.tts_rate,
+        "tts": args.tts,
+        "bridge_args": bridge_argv,
+        "sentences": summarize([t["sentences"] for t in completed], module.percentile),
+        "first_audio": summarize([t["first_audio"] for t in completed], module.percentile),
+        "gap": summarize([g for t in completed for g in t["gaps"]], module.percentile),
+        "total": summarize([t["total"] for t in completed], module.percentile),
+        "spans": bridge.trace_stats.summary()["seconds"],
+    }
+
+
+def stub_tts(rate: float, output: str, text: str) -> int:
+    """The --tts-command stand-in: sleep like a synthesizer, then write a tone."""
+    time.sleep(len(text) / rate)
+    Path(output).write_bytes(tone_wav(len(text) / SPEECH_CHARS_PER_SECOND))
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().splitlines()[0],
+        epilog="Unrecognised arguments are passed to the bridge.",
+    )
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1, help="untimed turns first")
+    parser.add_argument("--devices", type=int, default=1, help="simulated Voice PEs speaking at once")
+    parser.add_argument("--reply", default=DEFAULT_REPLY, help="text the stub Hermes streams")
+    parser.add_argument("--token-rate", type=float, default=20.0, help="stub Hermes tokens per second")
+    parser.add_argument("--first-token-delay", type=float, default=0.4, help="stub Hermes seconds before the first token")
+    parser.add_argument("--tts-rate", type=float, default=80.0, help="stub TTS characters synthesized per second")
+    parser.add_argument("--tts", choices=("http", "command"), default="http", help="stub TTS interface")
+    parser.add_argument("--audio", help="16 kHz mono WAV to replay; runs real Whisper")
+    parser.add_argument("--transcript", default="What is on my schedule today?", help="STT result when no --audio is given")
+    parser.add_argument("--audio-speed", type=float, default=1.0, help="replay speed; 0 sends all audio at once")
+    parser.add_argument("--verbose", action="store_true", help="print every turn as a JSON line")
+    parser.add_argument("--stub-tts", type=float, help=argparse.SUPPRESS)
+    parser.add_argument("--output", help=argparse.SUPPRESS)
+    args, bridge_argv = parser.parse_known_args()
+    if args.stub_tts is not None:
+        text = bridge_argv[-1] if bridge_argv else ""
+        return stub_tts(args.stub_tts, args.output, text)
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    print(json.dumps(asyncio.run(benchmark(args, bridge_argv)), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -14,6 +14,10 @@ let
       aioesphomeapi
       faster-whisper
       httpx
+      h2
+      numpy
+      soundfile
+      soxr
     ]
   );
   espeakTts = writeShellScriptBin "voice-pe-espeak-tts" ''
@@ -50,8 +54,16 @@ let
       exec ${pythonEnv}/bin/python ${./voice-pe-hermes-bridge.py} "$@"
     '';
   };
+  bench = writeShellApplication {
+    name = "voice-pe-hermes-bench";
+    runtimeInputs = [ ffmpeg ];
+    text = ''
+      export VOICE_PE_BRIDGE_SOURCE=${./voice-pe-hermes-bridge.py}
+      exec ${pythonEnv}/bin/python ${./voice-pe-hermes-bench.py} "$@"
+    '';
+  };
 in
 symlinkJoin {
   name = "voice-pe-hermes-bridge-0.1.0";
-  paths = [ bridge espeakTts neuttsServer neuttsTts ];
+  paths = [ bridge bench espeakTts neuttsServer neuttsTts ];
 }
@@ -5,37 +5,81 @@ The device sends API-audio PCM (16 kHz, 16-bit, mono).  We transcribe it on
 the studio workstation, send the text to Hermes over its authenticated
 OpenAI-compatible API, synthesize the reply with a local command, and expose
 the resulting 48 kHz mono FLAC briefly over the studio LAN for announcement
-playback.
+playback.  One process can serve several devices, each with its own
+Hermes session, sharing a single Whisper model and TTS backend.
 """
 
 from __future__ import annotations
 
 import argparse
 import asyncio
+import contextvars
+import hashlib
+import importlib.util
+import io
 import json
 import logging
 import os
 import re
 import shlex
 import tempfile
+import threading
+import time
 import uuid
-import wave
-from contextlib import suppress
+from collections import Counter, OrderedDict, defaultdict, deque
+from contextlib import aclosing, contextmanager, nullcontext, suppress
 from pathlib import Path
-from typing import Any, AsyncIterator
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, ContextManager, Iterator
 
 import aioesphomeapi
 import httpx
+import numpy as np
 from aioesphomeapi import VoiceAssistantEventType
 from faster_whisper import WhisperModel
 
+try:
+    import soundfile
+    import soxr
+except ImportError:  # ffmpeg remains the encoder
+    soundfile = soxr = None
+
 
 LOG = logging.getLogger("voice-pe-hermes")
 VOICE_CHUNK_MIN_CHARS = 24
-PROTECTED_DOT = "\x00"
+VOICE_CHUNK_MAX_CHARS = 400
+VOICE_CLAUSE_MIN_CHARS = 12
+# Typical speaking rate of the TTS voices, used to size later chunks.
+SPEECH_CHARS_PER_SECOND = 14.0
+ANNOUNCEMENT_RATE = 48_000
+HTTP_KEEPALIVE_SECONDS = 15.0
+HTTP_MAX_HEADERS = 64
+HTTP_WRITE_CHUNK = 64 * 1024
+# Request bodies up to this size are read and discarded to keep the
+# connection; anything larger, or chunked, closes it after the response.
+HTTP_MAX_DISCARD = 64 * 1024
+HTTP_BYTE_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+# Replies longer than this are unlikely to repeat and are not cached.
+AUDIO_CACHE_MAX_CHARS = 200
+# Spoken after the matching fail() code; rendered once at startup.
+FAILURE_PHRASES = {
+    "empty-audio": "I didn't hear anything.",
+    "no-speech": "Sorry, I couldn't make that out.",
+    "empty-hermes-response": "I don't have an answer for that.",
+    "bridge-error": "Sorry, something went wrong.",
+}
 VOICE_ABBREVIATIONS = ("e.g.", "i.e.", "Mr.", "Mrs.", "Ms.", "Dr.")
-VOICE_BOUNDARY = re.compile(
-    rf"(?<=[.!?])\s+|(?=\n\s*\d+{re.escape(PROTECTED_DOT)}\s)"
+# Sentence punctuation followed by whitespace, or a line that starts a
+# numbered list item ("\n 2. ...").
+VOICE_BOUNDARY = re.compile(r"[.!?](?=\s)|\n(?=\s*\d+\.\s)")
+VOICE_LIST_NUMBER = re.compile(r"\s*\d+")
+# A line start that may still grow into a list item boundary.
+VOICE_PENDING_ITEM = re.compile(r"\n\s*\d*\.?")
+# Places to end an early first chunk: after clause punctuation, or before
+# a conjunction.
+VOICE_CLAUSE = re.compile(
+    r"(?P<mark>[,;:])(?=\s)"
+    r"|\s+(?=(?:and|but|or|so|because|which|while|though|although)\s)",
+    re.IGNORECASE,
 )
 
 
@@ -52,54 +96,285 @@ def read_secret(path: str) -> str:
     return value
 
 
-def write_pcm_wav(path: Path, pcm: bytes) -> None:
-    with wave.open(str(path), "wb") as output:
-        output.setnchannels(1)
-        output.setsampwidth(2)
-        output.setframerate(16_000)
-        output.writeframes(pcm)
+def pcm_to_float(
+    pcm: bytes | bytearray | memoryview, start: int = 0, end: int | None = None
+) -> np.ndarray:
+    """16 kHz 16-bit mono PCM as the float32 samples Whisper expects.
+
+    The int16 view over the buffer is zero-copy; the only copy is the float
+    conversion itself, which is scaled in place.
+    """
+    end = len(pcm) if end is None else end
+    samples = np.frombuffer(
+        pcm, dtype="<i2", count=(end - start) // 2, offset=start
+    ).astype(np.float32)
+    samples *= 1 / 32768
+    return samples
+
+
+def decode_segments(
+    model: WhisperModel, audio: np.ndarray, **options: Any
+) -> list[tuple[float, str]]:
+    """Decode samples and return (segment end in seconds, text) pairs."""
+    segments, _ = model.transcribe(audio, language="en", **options)
+    return [(segment.end, segment.text.strip()) for segment in segments]
+
+
+def decode_pcm(model: WhisperModel, audio: np.ndarray, **options: Any) -> str:
+    segments = decode_segments(model, audio, **options)
+    return " ".join(text for _end, text in segments if text).strip()
 
 
-def extract_voice_chunks(text: str, *, flush: bool = False) -> tuple[list[str], str]:
-    """Extract speakable chunks without breaking abbreviations or list markers."""
-    protected = text
-    for abbreviation in VOICE_ABBREVIATIONS:
-        protected = protected.replace(
-            abbreviation, abbreviation.replace(".", PROTECTED_DOT)
+class TurnTrace:
+    """Span timings of one voice turn, in seconds from the wake word."""
+
+    def __init__(self, device: str = "") -> None:
+        self.turn_id = uuid.uuid4().hex
+        self.device = device
+        self.run_id: str | None = None
+        self.wall_start = time.time()
+        self.started = time.monotonic()
+        self.spans: list[dict[str, Any]] = []
+        self.marks: dict[str, float] = {}
+
+    def add_span(self, name: str, start: float, end: float, **attrs: Any) -> None:
+        self.spans.append(
+            {
+                "name": name,
+                "start": round(start - self.started, 4),
+                "seconds": round(end - start, 4),
+                **attrs,
+            }
         )
-    protected = re.sub(
-        rf"(?m)(^|\n)(\s*\d+)\.",
-        rf"\1\2{PROTECTED_DOT}",
-        protected,
-    )
-    matches = list(VOICE_BOUNDARY.finditer(protected))
-    if not matches:
-        if flush and protected.strip():
-            return [protected.replace(PROTECTED_DOT, ".").strip()], ""
-        return [], text
-
-    chunks: list[str] = []
-    start = 0
-    for match in matches:
-        chunk = protected[start : match.start()].replace(PROTECTED_DOT, ".").strip()
-        if chunk:
-            chunks.append(chunk)
-        start = match.end()
-    remainder = protected[start:].replace(PROTECTED_DOT, ".")
-    if flush and remainder.strip():
-        chunks.append(remainder.strip())
-        remainder = ""
-    return chunks, remainder
-
-
-async def run_command(argv: list[str], timeout: float) -> None:
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[None]:
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.monotonic(), **attrs)
+
+    def mark(self, name: str) -> None:
+        """Record the first time a milestone is reached."""
+        self.marks.setdefault(name, round(time.monotonic() - self.started, 4))
+
+    def record(self, outcome: str) -> dict[str, Any]:
+        record: dict[str, Any] = {
+            "turn_id": self.turn_id,
+            "device": self.device,
+            "run_id": self.run_id,
+            "time": round(self.wall_start, 3),
+            "outcome": outcome,
+            "total": round(time.monotonic() - self.started, 4),
+            "marks": self.marks,
+            "spans": self.spans,
+        }
+        if "capture_end" in self.marks and "first_audio" in self.marks:
+            # What the user waits: end of speech to the device fetching audio.
+            record["response"] = round(
+                self.marks["first_audio"] - self.marks["capture_end"], 4
+            )
+        return record
+
+
+# The trace of the turn running in the current task and its children.
+TRACE: contextvars.ContextVar[TurnTrace | None] = contextvars.ContextVar(
+    "voice_pe_trace", default=None
+)
+
+
+def trace_span(name: str, **attrs: Any) -> ContextManager[None]:
+    trace = TRACE.get()
+    return trace.span(name, **attrs) if trace is not None else nullcontext()
+
+
+class TraceStats:
+    """Rolling p50/p95 timings over the most recent turns."""
+
+    def __init__(self, size: int = 200) -> None:
+        self.turns: deque[dict[str, Any]] = deque(maxlen=size)
+
+    def add(self, record: dict[str, Any]) -> None:
+        self.turns.append(record)
+
+    def summary(self) -> dict[str, Any]:
+        samples: dict[str, list[float]] = defaultdict(list)
+        for turn in self.turns:
+            samples["total"].append(turn["total"])
+            if "response" in turn:
+                samples["response"].append(turn["response"])
+            for name, at in turn["marks"].items():
+                samples[f"at.{name}"].append(at)
+            per_turn: dict[str, float] = defaultdict(float)
+            for span in turn["spans"]:
+                per_turn[span["name"]] += span["seconds"]
+            for name, seconds in per_turn.items():
+                samples[name].append(seconds)
+        return {
+            "turns": len(self.turns),
+            "outcomes": dict(Counter(turn["outcome"] for turn in self.turns)),
+            "seconds": {
+                name: {
+                    "count": len(values),
+                    "p50": round(percentile(sorted(values), 0.50), 4),
+                    "p95": round(percentile(sorted(values), 0.95), 4),
+                }
+                for name, values in sorted(samples.items())
+            },
+        }
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class ChunkPolicy:
+    """Choose how much reply text each TTS chunk should carry.
+
+    The first chunk goes out as soon as there is a sentence or clause to
+    say. Each later chunk is sized so that its text can arrive and then be
+    rendered while the previous chunk plays; the two happen one after the
+    other, so their times add up. Chunks only grow past the minimum when
+    that leaves spare time, so a slow stream or slow TTS keeps them short
+    and a fast one lets them grow for fewer, more natural announcements.
+    """
+
+    def __init__(self) -> None:
+        self.chunks = 0
+        self.target = VOICE_CHUNK_MIN_CHARS
+        self.started: float | None = None
+        self.arrived = 0
+        self.complete = False
+
+    def arrive(self, text: str) -> None:
+        if self.started is None:
+            self.started = time.monotonic()
+        self.arrived += len(text)
+
+    def arrival_rate(self) -> float | None:
+        """Characters per second from Hermes; None once the reply is whole."""
+        if self.complete or self.started is None:
+            return None
+        elapsed = time.monotonic() - self.started
+        return self.arrived / elapsed if elapsed > 0.5 else None
+
+    def ready(self, pending: str) -> bool:
+        return bool(pending) and (self.chunks == 0 or len(pending) >= self.target)
+
+    def emitted(self, chunk: str, tts_rate: float | None) -> None:
+        self.chunks += 1
+        arrival = self.arrival_rate()
+        if not tts_rate or (arrival is None and not self.complete):
+            self.target = VOICE_CHUNK_MIN_CHARS
+            return
+        # Seconds per character to get text in and rendered; text that has
+        # all arrived only costs the rendering.
+        cost = 1 / tts_rate + (1 / arrival if arrival else 0.0)
+        playing = len(chunk) / SPEECH_CHARS_PER_SECOND
+        self.target = int(
+            min(VOICE_CHUNK_MAX_CHARS, max(VOICE_CHUNK_MIN_CHARS, playing / cost))
+        )
+
+
+class VoiceSegmenter:
+    """Split streamed reply text into speakable chunks as it arrives.
+
+    Only text that has not been scanned yet is searched, except for a short
+    tail whose boundary still depends on characters to come, so the cost per
+    delta does not grow with the length of the reply. Abbreviations and the
+    dots of numbered list markers never end a chunk.
+    """
+
+    def __init__(self) -> None:
+        self.buffer = ""
+        self.scanned = 0
+        self.at_line_start = True
+
+    def feed(self, delta: str) -> list[str]:
+        self.buffer += delta
+        chunks: list[str] = []
+        start = 0
+        origin = position = self.scanned
+        while match := VOICE_BOUNDARY.search(self.buffer, position):
+            position = match.end()
+            if match.group() == "\n":
+                end = match.start()
+                position = end + 1
+            elif match.group() == "." and self._protected(start, match.start()):
+                continue
+            else:
+                end = match.end()
+            if chunk := self.buffer[start:end].strip():
+                chunks.append(chunk)
+            start = end
+            self.at_line_start = False
+        self.buffer = self.buffer[start:]
+        self.scanned = self._resume(max(0, origin - start))
+        return chunks
+
+    def take_clause(self, min_chars: int, max_words: int) -> str | None:
+        """Cut the unfinished sentence early for a fast first chunk.
+
+        Cuts at the last clause break at least min_chars in, or after
+        max_words complete words; None while neither is available.
+        """
+        cut = 0
+        for match in VOICE_CLAUSE.finditer(self.buffer):
+            end = match.end() if match.group("mark") else match.start()
+            if len(self.buffer[:end].strip()) >= min_chars:
+                cut = end
+        if not cut and max_words > 0:
+            if words := re.match(rf"\s*(?:\S+\s+){{{max_words}}}", self.buffer):
+                cut = words.end()
+        if not cut:
+            return None
+        chunk = self.buffer[:cut].strip()
+        self.buffer = self.buffer[cut:]
+        self.scanned = max(0, self.scanned - cut)
+        self.at_line_start = False
+        return chunk
+
+    def flush(self) -> list[str]:
+        rest = self.buffer.strip()
+        self.buffer = ""
+        self.scanned = 0
+        return [rest] if rest else []
+
+    def _protected(self, start: int, dot: int) -> bool:
+        if self.buffer.endswith(VOICE_ABBREVIATIONS, start, dot + 1):
+            return True
+        line = self.buffer.rfind("\n", start, dot) + 1
+        if line == 0 and not (start == 0 and self.at_line_start):
+            return False
+        return VOICE_LIST_NUMBER.fullmatch(self.buffer, max(line, start), dot) is not None
+
+    def _resume(self, searched_from: int) -> int:
+        """Where the next scan starts: before any boundary still undecided."""
+        end = len(self.buffer)
+        position = end - 1 if end and self.buffer[-1] in ".!?" else end
+        newline = self.buffer.rfind("\n", searched_from)
+        if newline >= 0 and VOICE_PENDING_ITEM.fullmatch(self.buffer, newline):
+            position = min(position, newline)
+        return position
+
+
+async def run_command(
+    argv: list[str], timeout: float, stdin: bytes | None = None
+) -> bytes:
     process = await asyncio.create_subprocess_exec(
         *argv,
+        stdin=asyncio.subprocess.PIPE if stdin is not None else None,
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.PIPE,
     )
     try:
-        _stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        stdout, stderr = await asyncio.wait_for(
+            process.communicate(stdin), timeout=timeout
+        )
     except asyncio.CancelledError:
         process.terminate()
         with suppress(ProcessLookupError):
@@ -108,107 +383,1047 @@ async def run_command(argv: list[str], timeout: float) -> None:
     if process.returncode != 0:
         detail = stderr.decode("utf-8", "replace").strip()
         raise RuntimeError(f"command failed ({process.returncode}): {detail}")
+    return stdout
+
+
+async def run_tts(command: str, text: str) -> bytes:
+    with tempfile.TemporaryDirectory(prefix="voice-pe-tts-") as directory:
+        output = Path(directory) / "reply.wav"
+        argv = [*shlex.split(command), "--output", str(output), text]
+        LOG.info("synthesizing %d characters with %s", len(text), argv[0])
+        await run_command(argv, timeout=180)
+        if not output.is_file() or output.stat().st_size == 0:
+            raise RuntimeError(f"TTS command did not create audio: {output}")
+        return output.read_bytes()
 
 
-async def run_tts(command: str, text: str, output: Path) -> None:
-    argv = [*shlex.split(command), "--output", str(output), text]
-    LOG.info("synthesizing %d characters with %s", len(text), argv[0])
-    await run_command(argv, timeout=180)
-    if not output.is_file() or output.stat().st_size == 0:
-        raise RuntimeError(f"TTS command did not create audio: {output}")
-
-
-async def convert_to_flac(source: Path, output: Path) -> None:
-    await run_command(
-        [
-            env("VOICE_PE_FFMPEG", "ffmpeg"),
-            "-nostdin",
-            "-hide_banner",
-            "-loglevel",
-            "error",
-            "-y",
-            "-i",
-            str(source),
-            "-ac",
-            "1",
-            "-ar",
-            "48000",
-            "-c:a",
-            "flac",
-            str(output),
-        ],
+def ffmpeg_command(*args: str) -> list[str]:
+    return [
+        env("VOICE_PE_FFMPEG", "ffmpeg"),
+        "-nostdin",
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        *args,
+    ]
+
+
+def resample_tts_audio(wav: bytes) -> np.ndarray | None:
+    """TTS output as 48 kHz mono float32 samples, decoded in memory.
+
+    Returns None when soundfile/soxr are unavailable or cannot read the input,
+    so the caller can fall back to ffmpeg.
+    """
+    if soundfile is None or soxr is None:
+        return None
+    try:
+        audio, rate = soundfile.read(io.BytesIO(wav), dtype="float32", always_2d=True)
+    except RuntimeError:
+        LOG.warning("soundfile could not decode TTS audio", exc_info=True)
+        return None
+    audio = audio.mean(axis=1)
+    if rate != ANNOUNCEMENT_RATE:
+        audio = soxr.resample(audio, rate, ANNOUNCEMENT_RATE)
+    return np.clip(audio, -1.0, 1.0)
+
+
+def encode_flac(wav: bytes) -> bytes | None:
+    """Resample TTS audio to 48 kHz mono FLAC in memory, None if unsupported."""
+    audio = resample_tts_audio(wav)
+    if audio is None:
+        return None
+    output = io.BytesIO()
+    soundfile.write(output, audio, ANNOUNCEMENT_RATE, format="FLAC", subtype="PCM_16")
+    return output.getvalue()
+
+
+def encode_pcm(wav: bytes) -> bytes | None:
+    """Resample TTS audio to 48 kHz 16-bit mono PCM in memory, None if unsupported."""
+    audio = resample_tts_audio(wav)
+    if audio is None:
+        return None
+    return (audio * 32767).astype("<i2").tobytes()
+
+
+async def convert_to_flac(wav: bytes) -> bytes:
+    return await run_command(
+        ffmpeg_command(
+            "-i", "pipe:0", "-ac", "1", "-ar", str(ANNOUNCEMENT_RATE),
+            "-c:a", "flac", "-f", "flac", "pipe:1",
+        ),
         timeout=180,
+        stdin=wav,
     )
 
 
+async def convert_to_pcm(wav: bytes) -> bytes:
+    return await run_command(
+        ffmpeg_command(
+            "-i", "pipe:0", "-ac", "1", "-ar", str(ANNOUNCEMENT_RATE),
+            "-f", "s16le", "pipe:1",
+        ),
+        timeout=180,
+        stdin=wav,
+    )
+
+
+async def iter_sse(response: httpx.Response) -> AsyncIterator[dict[str, Any]]:
+    """JSON payloads of a server-sent event stream, one per event.
+
+    Data lines are joined with newlines until the blank line that ends the
+    event; comments and other fields are ignored.
+    """
+    data: list[str] = []
+    async for line in response.aiter_lines():
+        if not line:
+            if data:
+                payload = "\n".join(data)
+                data = []
+                yield json.loads(payload)
+            continue
+        field, _, value = line.partition(":")
+        if field == "data":
+            data.append(value[1:] if value.startswith(" ") else value)
+    if data:
+        yield json.loads("\n".join(data))
+
+
+class MediaStream:
+    """A media body that grows while it is being served."""
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.finished = False
+        self.changed = asyncio.Event()
+
+    def append(self, data: bytes) -> None:
+        if data:
+            self.chunks.append(data)
+            self._wake()
+
+    def body(self) -> bytes:
+        return b"".join(self.chunks)
+
+    def finish(self) -> None:
+        self.finished = True
+        self._wake()
+
+    def _wake(self) -> None:
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    async def iterate(self) -> AsyncIterator[bytes]:
+        """Yield every chunk from the start, waiting for more until finished."""
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.finished:
+                return
+            changed = self.changed
+            await changed.wait()
+
+
+class FlacStreamEncoder:
+    """Encode 48 kHz PCM into one continuous FLAC stream as it is written.
+
+    A single ffmpeg process per reply turns the PCM of every sentence into
+    FLAC frames that are appended to a MediaStream as soon as they exist.
+    """
+
+    def __init__(self, media: MediaStream) -> None:
+        self.media = media
+        self.process: asyncio.subprocess.Process | None = None
+        self.reader: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        self.process = await asyncio.create_subprocess_exec(
+            *ffmpeg_command(
+                "-f", "s16le", "-ar", str(ANNOUNCEMENT_RATE), "-ac", "1", "-i", "pipe:0",
+                "-c:a", "flac", "-f", "flac", "-flush_packets", "1", "pipe:1",
+            ),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        self.reader = asyncio.create_task(self._read())
+
+    async def _read(self) -> None:
+        assert self.process is not None and self.process.stdout is not None
+        while chunk := await self.process.stdout.read(16_384):
+            self.media.append(chunk)
+
+    async def write(self, pcm: bytes) -> None:
+        assert self.process is not None and self.process.stdin is not None
+        self.process.stdin.write(pcm)
+        await self.process.stdin.drain()
+
+    async def finish(self) -> None:
+        assert self.process is not None and self.process.stdin is not None
+        self.process.stdin.close()
+        await self.reader
+        if await self.process.wait() != 0:
+            raise RuntimeError(f"ffmpeg stream encoder failed ({self.process.returncode})")
+        self.media.finish()
+
+    async def abort(self) -> None:
+        if self.reader is not None:
+            self.reader.cancel()
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+            await self.process.wait()
+        self.media.finish()
+
+
+class AudioCache:
+    """Content-addressed LRU of rendered speech, in memory and on disk.
+
+    Keys hash everything that shapes the audio (TTS backend, voice, output
+    format and text). Both tiers evict least recently used entries once
+    their byte budget is exceeded; disk recency survives restarts as file
+    mtimes. Disk I/O runs in worker threads.
+    """
+
+    def __init__(self, directory: str, memory_bytes: int, disk_bytes: int) -> None:
+        self.memory: OrderedDict[str, bytes] = OrderedDict()
+        self.memory_bytes = memory_bytes
+        self.memory_used = 0
+        self.disk: OrderedDict[str, int] = OrderedDict()
+        self.disk_bytes = disk_bytes
+        self.disk_used = 0
+        # Keys being written to disk, so concurrent misses write them once
+        self.writing: set[str] = set()
+        self.directory = Path(directory) if directory and disk_bytes > 0 else None
+        self.hits = 0
+        self.misses = 0
+        if self.directory is not None:
+            self._scan()
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    def _scan(self) -> None:
+        assert self.directory is not None
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            files = [(path.stat(), path.name) for path in self.directory.glob("*.audio")]
+        except OSError:
+            LOG.warning("audio cache directory unusable; caching in memory only", exc_info=True)
+            self.directory = None
+            return
+        for stat, name in sorted(files, key=lambda item: item[0].st_mtime):
+            self.disk[name.removesuffix(".audio")] = stat.st_size
+            self.disk_used += stat.st_size
+        LOG.info("audio cache: %d clips, %.1f MiB on disk", len(self.disk), self.disk_used / 2**20)
+
+    def _path(self, key: str) -> Path:
+        assert self.directory is not None
+        return self.directory / f"{key}.audio"
+
+    async def get(self, key: str) -> bytes | None:
+        if (data := self.memory.get(key)) is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return data
+        if self.directory is not None and key in self.disk:
+            try:
+                data = await asyncio.to_thread(self._read, self._path(key))
+            except OSError:
+                self._forget(key)
+            else:
+                self.disk.move_to_end(key)
+                self._remember(key, data)
+                self.hits += 1
+                return data
+        self.misses += 1
+        return None
+
+    @staticmethod
+    def _read(path: Path) -> bytes:
+        data = path.read_bytes()
+        os.utime(path)
+        return data
+
+    async def put(self, key: str, data: bytes) -> None:
+        self._remember(key, data)
+        if (
+            self.directory is None
+            or len(data) > self.disk_bytes
+            or key in self.disk
+            or key in self.writing
+        ):
+            return
+        self.writing.add(key)
+        try:
+            await asyncio.to_thread(self._write, self._path(key), data)
+        except OSError:
+            LOG.warning("could not write audio cache entry", exc_info=True)
+            return
+        finally:
+            self.writing.discard(key)
+        self.disk[key] = len(data)
+        self.disk_used += len(data)
+        stale: list[Path] = []
+        while self.disk_used > self.disk_bytes:
+            old, size = self.disk.popitem(last=False)
+            self.disk_used -= size
+            stale.append(self._path(old))
+        if stale:
+            await asyncio.to_thread(self._unlink, stale)
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        # A unique name per write, in case another bridge shares the directory
+        fd, partial = tempfile.mkstemp(
+            dir=path.parent, prefix=f"{path.stem}.", suffix=".partial"
+        )
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(partial, path)
+        except BaseException:
+            with suppress(OSError):
+                os.unlink(partial)
+            raise
+
+    @staticmethod
+    def _unlink(paths: list[Path]) -> None:
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+    def _remember(self, key: str, data: bytes) -> None:
+        if len(data) > self.memory_bytes:
+            return
+        if (old := self.memory.pop(key, None)) is not None:
+            self.memory_used -= len(old)
+        self.memory[key] = data
+        self.memory_used += len(data)
+        while self.memory_used > self.memory_bytes:
+            _, dropped = self.memory.popitem(last=False)
+            self.memory_used -= len(dropped)
+
+    def _forget(self, key: str) -> None:
+        self.disk_used -= self.disk.pop(key, 0)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory_used,
+            "disk_entries": len(self.disk),
+            "disk_bytes": self.disk_used,
+        }
+
+
+def parse_byte_range(match: re.Match[str], size: int) -> tuple[int, int] | None:
+    """Half-open (start, end) of a single byte range, None if unsatisfiable."""
+    first, last = match.groups()
+    if not first:
+        if not last or int(last) == 0:
+            return None
+        return max(0, size - int(last)), size
+    start = int(first)
+    end = min(size, int(last) + 1) if last else size
+    if start >= size or end <= start:
+        return None
+    return start, end
+
+
 class AnnouncementServer:
-    """Serve one random, short-lived FLAC path at a time."""
+    """Serve random, short-lived FLAC paths, either whole or still growing.
 
-    def __init__(self, bind: str, port: int, public_base: str) -> None:
+    A minimal HTTP/1.1 server: GET and HEAD with keep-alive, single byte
+    ranges for complete media, and chunked bodies for growing streams
+    (close-delimited for HTTP/1.0 clients).
+    Paths that are never fetched expire after ttl seconds.
+    """
+
+    def __init__(self, bind: str, port: int, public_base: str, ttl: float = 120.0) -> None:
         self.bind = bind
         self.port = port
         self.public_base = public_base.rstrip("/")
+        self.ttl = ttl
         self.server: asyncio.AbstractServer | None = None
-        self.media: dict[str, bytes] = {}
+        self.sweeper: asyncio.Task[None] | None = None
+        self.media: dict[str, bytes | MediaStream] = {}
+        self.added: dict[str, float] = {}
+        self.fetched: set[str] = set()
+        self.on_fetch: dict[str, Callable[[], None]] = {}
+        self.connections: set[asyncio.StreamWriter] = set()
+        self.handlers: set[asyncio.Task[Any]] = set()
+        # JSON served at /stats when set.
+        self.stats: Callable[[], dict[str, Any]] | None = None
 
     async def start(self) -> None:
         self.server = await asyncio.start_server(self._handle, self.bind, self.port)
+        self.sweeper = asyncio.create_task(self._sweep())
         LOG.info("announcement server listening on %s:%d", self.bind, self.port)
 
     async def close(self) -> None:
+        if self.sweeper is not None:
+            self.sweeper.cancel()
         if self.server is not None:
             self.server.close()
+            for writer in list(self.connections):
+                writer.close()
+            if self.handlers:
+                # Closed connections end their handlers; a stream still
+                # waiting for audio is cancelled.
+                _done, pending = await asyncio.wait(self.handlers, timeout=1.0)
+                for task in pending:
+                    task.cancel()
             await self.server.wait_closed()
 
-    def add(self, data: bytes) -> tuple[str, str]:
+    def add(
+        self, data: bytes | MediaStream, on_fetch: Callable[[], None] | None = None
+    ) -> tuple[str, str]:
+        """Publish media; on_fetch runs when the device first requests it."""
         token = uuid.uuid4().hex
         path = f"/{token}.flac"
         self.media[path] = data
+        self.added[path] = time.monotonic()
+        if on_fetch is not None:
+            self.on_fetch[path] = on_fetch
         return path, f"{self.public_base}{path}"
 
     def remove(self, path: str) -> None:
         self.media.pop(path, None)
+        self.added.pop(path, None)
+        self.fetched.discard(path)
+        self.on_fetch.pop(path, None)
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, self.ttl / 4))
+            deadline = time.monotonic() - self.ttl
+            for path, added in list(self.added.items()):
+                if path not in self.fetched and added < deadline:
+                    LOG.warning("announcement %s expired without being fetched", path)
+                    self.remove(path)
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader, idle_timeout: float
+    ) -> tuple[str, str, str, dict[str, str]] | None:
+        """Request line and headers, or None when the client went away."""
+        try:
+            line = await asyncio.wait_for(reader.readline(), timeout=idle_timeout)
+        except asyncio.TimeoutError:
+            return None
+        if not line.strip():
+            return None
+        method, target, version = line.decode("ascii").split()
+        headers: dict[str, str] = {}
+        while (line := await asyncio.wait_for(reader.readline(), timeout=5)).strip():
+            if len(headers) >= HTTP_MAX_HEADERS:
+                raise ValueError("too many request headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return method, target.split("?", 1)[0], version, headers
 
     async def _handle(
         self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
     ) -> None:
+        self.connections.add(writer)
+        if (task := asyncio.current_task()) is not None:
+            self.handlers.add(task)
         try:
-            request = await asyncio.wait_for(reader.readline(), timeout=5)
-            target = request.decode("ascii", "replace").split(" ")[1]
-            data = self.media.get(target)
-            if data is None:
-                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
-            else:
-                writer.write(
-                    b"HTTP/1.1 200 OK\r\n"
-                    + f"Content-Type: audio/flac\r\nContent-Length: {len(data)}\r\n".encode()
-                    + b"Cache-Control: no-store\r\nConnection: close\r\n\r\n"
-                    + data
+            idle_timeout = 5.0
+            while request := await self._read_request(reader, idle_timeout):
+                method, target, version, headers = request
+                connection = headers.get("connection", "").lower()
+                keep_alive = (
+                    connection == "keep-alive"
+                    if version == "HTTP/1.0"
+                    else connection != "close"
                 )
-            await writer.drain()
-        except (asyncio.TimeoutError, IndexError, UnicodeError):
+                length = int(headers.get("content-length", "0"))
+                if length < 0:
+                    raise ValueError(f"negative Content-Length {length}")
+                if "transfer-encoding" in headers or length > HTTP_MAX_DISCARD:
+                    keep_alive = False
+                elif length:
+                    await asyncio.wait_for(
+                        reader.readexactly(length), HTTP_KEEPALIVE_SECONDS
+                    )
+                keep_alive = await self._respond(
+                    writer, method, target, version, headers, keep_alive
+                )
+                if not keep_alive:
+                    break
+                idle_timeout = HTTP_KEEPALIVE_SECONDS
+        except (asyncio.TimeoutError, ValueError, UnicodeError):
             LOG.debug("invalid announcement HTTP request", exc_info=True)
+            with suppress(ConnectionError):
+                writer.write(self._head("400 Bad Request", {"Content-Length": "0"}, False))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            LOG.debug("announcement client disconnected", exc_info=True)
         finally:
+            self.connections.discard(writer)
+            self.handlers.discard(asyncio.current_task())
             writer.close()
-            await writer.wait_closed()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    @staticmethod
+    def _head(status: str, headers: dict[str, str], keep_alive: bool) -> bytes:
+        lines = [f"HTTP/1.1 {status}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _respond(
+        self,
+        writer: asyncio.StreamWriter,
+        method: str,
+        target: str,
+        version: str,
+        headers: dict[str, str],
+        keep_alive: bool,
+    ) -> bool:
+        """Answer one request; returns whether the connection stays open"""
+        if method not in ("GET", "HEAD"):
+            writer.write(
+                self._head(
+                    "405 Method Not Allowed",
+                    {"Allow": "GET, HEAD", "Content-Length": "0"},
+                    keep_alive,
+                )
+            )
+            await writer.drain()
+            return keep_alive
+        if target == "/stats" and self.stats is not None:
+            body = json.dumps(self.stats()).encode()
+            writer.write(
+                self._head(
+                    "200 OK",
+                    {"Content-Type": "application/json", "Content-Length": str(len(body))},
+                    keep_alive,
+                )
+            )
+            if method == "GET":
+                writer.write(body)
+            await writer.drain()
+            return keep_alive
+        data = self.media.get(target)
+        if data is None:
+            writer.write(self._head("404 Not Found", {"Content-Length": "0"}, keep_alive))
+            await writer.drain()
+            return keep_alive
+        self.fetched.add(target)
+        if (on_fetch := self.on_fetch.pop(target, None)) is not None:
+            on_fetch()
+        common = {"Content-Type": "audio/flac", "Cache-Control": "no-store"}
+
+        if isinstance(data, MediaStream) and not data.finished:
+            # HTTP/1.0 has no chunked encoding; the body ends when we close
+            chunked = version != "HTTP/1.0"
+            keep_alive = keep_alive and chunked
+            framing = {"Transfer-Encoding": "chunked"} if chunked else {}
+            writer.write(self._head("200 OK", {**common, **framing}, keep_alive))
+            if method == "GET":
+                async for chunk in data.iterate():
+                    if chunked:
+                        writer.write(f"{len(chunk):x}\r\n".encode())
+                    writer.write(chunk)
+                    if chunked:
+                        writer.write(b"\r\n")
+                    await writer.drain()
+                if chunked:
+                    writer.write(b"0\r\n\r\n")
+            await writer.drain()
+            return keep_alive
+
+        body = memoryview(data.body() if isinstance(data, MediaStream) else data)
+        size = len(body)
+        start, end = 0, size
+        status = "200 OK"
+        response = {**common, "Accept-Ranges": "bytes"}
+        if match := HTTP_BYTE_RANGE.fullmatch(headers.get("range", "").strip()):
+            byte_range = parse_byte_range(match, size)
+            if byte_range is None:
+                response = {**response, "Content-Range": f"bytes */{size}", "Content-Length": "0"}
+                writer.write(self._head("416 Range Not Satisfiable", response, keep_alive))
+                await writer.drain()
+                return keep_alive
+            start, end = byte_range
+            status = "206 Partial Content"
+            response["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+        response["Content-Length"] = str(end - start)
+        writer.write(self._head(status, response, keep_alive))
+        if method == "GET":
+            for offset in range(start, end, HTTP_WRITE_CHUNK):
+                writer.write(body[offset:min(end, offset + HTTP_WRITE_CHUNK)])
+                await writer.drain()
+        await writer.drain()
+        return keep_alive
+
+
+class CaptureBuffer:
+    """Preallocated ring holding the most recent max_seconds of 16 kHz PCM.
+
+    Positions are absolute byte offsets since start(); the ring keeps
+    [oldest, len(self)).  Audio is appended only from the event-loop audio
+    callback, so no lock is needed.  Each packet's level is measured as it
+    arrives, which gives the voiced span for trimming without a rescan.
+    """
+
+    def __init__(self, max_seconds: float, voice_level: float) -> None:
+        self.capacity = int(max_seconds * 16_000) * 2
+        self.data = bytearray(self.capacity)
+        self.voice_level = voice_level
+        self.written = 0
+        self.open = False
+        self.first_voiced: int | None = None
+        self.last_voiced = 0
+
+    def __len__(self) -> int:
+        return self.written
+
+    @property
+    def oldest(self) -> int:
+        return max(0, self.written - self.capacity)
+
+    def start(self) -> None:
+        self.written = 0
+        self.first_voiced = None
+        self.last_voiced = 0
+        self.open = True
+
+    def stop(self) -> None:
+        self.open = False
+
+    def append(self, data: bytes) -> None:
+        if not self.open or not data:
+            return
+        if self.written + len(data) > self.capacity >= self.written:
+            LOG.warning(
+                "capture exceeded %.0fs; keeping only the most recent audio",
+                self.capacity / 32_000,
+            )
+        skip = max(0, len(data) - self.capacity)
+        self.written += skip
+        chunk = memoryview(data)[skip:]
+        offset = self.written % self.capacity
+        first = min(len(chunk), self.capacity - offset)
+        self.data[offset:offset + first] = chunk[:first]
+        self.data[:len(chunk) - first] = chunk[first:]
+        samples = np.frombuffer(chunk, dtype="<i2", count=len(chunk) // 2)
+        level = np.sqrt(np.mean(np.square(samples, dtype=np.float32))) if len(samples) else 0.0
+        if level >= self.voice_level:
+            if self.first_voiced is None:
+                self.first_voiced = self.written
+            self.last_voiced = self.written + len(chunk)
+        self.written += len(chunk)
+
+    def views(self, start: int, end: int) -> list[memoryview]:
+        """Zero-copy views of [start, end), clamped to what the ring holds."""
+        start, end = max(start, self.oldest), min(end, self.written)
+        if end <= start:
+            return []
+        view = memoryview(self.data)
+        offset = start % self.capacity
+        if offset + end - start <= self.capacity:
+            return [view[offset:offset + end - start]]
+        return [view[offset:], view[:offset + end - start - self.capacity]]
+
+    def samples(self, start: int = 0, end: int | None = None) -> np.ndarray:
+        """Float32 samples of [start, end); copies only in the float conversion."""
+        parts = [
+            pcm_to_float(view)
+            for view in self.views(start, len(self) if end is None else end)
+        ]
+        if not parts:
+            return np.zeros(0, dtype=np.float32)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def voiced(self, padding: float) -> tuple[int, int]:
+        """Byte range of the speech plus padding; everything if none was heard."""
+        if self.first_voiced is None or self.last_voiced <= self.oldest:
+            return self.oldest, self.written
+        pad = int(padding * 16_000) * 2
+        return max(self.oldest, self.first_voiced - pad), min(self.written, self.last_voiced + pad)
+
+
+class StreamingTranscript:
+    """Transcribe an utterance in rolling windows while it is still arriving.
+
+    Every step seconds the not-yet-committed audio is decoded with VAD.
+    Segments that end at least holdback seconds before the live edge are
+    committed and their audio dropped from later windows, so at stop only
+    the short uncommitted tail still needs a decode.
+    """
+
+    def __init__(
+        self,
+        device: VoiceDevice,
+        capture: CaptureBuffer,
+        step: float,
+        holdback: float,
+    ) -> None:
+        self.device = device
+        self.capture = capture
+        self.step = step
+        self.holdback = holdback
+        self.committed_bytes = 0
+        self.committed: list[str] = []
+        self.decoded_bytes = 0
+        self.stopped = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+
+    def _options(self) -> dict[str, Any]:
+        options: dict[str, Any] = {"vad_filter": True, "beam_size": 5}
+        if self.committed:
+            options["initial_prompt"] = " ".join(self.committed)
+        return options
+
+    async def _run(self) -> None:
+        await asyncio.shield(self.device.bridge.preload_whisper())
+        while not self.stopped.is_set():
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.stopped.wait(), timeout=self.step)
+            if self.stopped.is_set():
+                break
+            available = len(self.capture)
+            if available - self.decoded_bytes < self.step * 32_000:
+                continue
+            self.decoded_bytes = available
+            start = max(self.committed_bytes, self.capture.oldest)
+            window = self.capture.samples(start, available)
+            segments = await self.device.decode(
+                decode_segments, self.device.bridge.whisper, window, **self._options()
+            )
+            live_edge = len(window) / 16_000 - self.holdback
+            for end, text in segments:
+                if end > live_edge:
+                    break
+                if text:
+                    self.committed.append(text)
+                # Segment times are relative to the window; keep whole samples.
+                self.committed_bytes = start + int(end * 16_000) * 2
+            LOG.debug("streaming STT committed %d segments", len(self.committed))
+
+    async def finish(self, end: int) -> str:
+        """Wait for any in-flight window, then decode only the tail up to end."""
+        self.stopped.set()
+        await self.task
+        tail = self.capture.samples(self.committed_bytes, end)
+        text = ""
+        if len(tail):
+            text = await self.device.decode(
+                decode_pcm, self.device.bridge.whisper, tail, **self._options()
+            )
+        return " ".join([*self.committed, text]).strip()
+
+    def abort(self) -> None:
+        self.stopped.set()
+        self.task.cancel()
+
+
+class FairPool:
+    """Bound concurrent jobs and hand free slots to owners in turn.
+
+    Waiters queue per owner and owners are served round-robin, so one
+    device's long utterance or reply cannot hold a shared worker while
+    another device waits behind it.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.free = max(1, workers)
+        self.waiting: OrderedDict[str, deque[asyncio.Future[None]]] = OrderedDict()
+
+    async def acquire(self, owner: str) -> None:
+        if self.free > 0 and not self.waiting:
+            self.free -= 1
+            return
+        granted: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self.waiting.setdefault(owner, deque()).append(granted)
+        try:
+            await granted
+        except asyncio.CancelledError:
+            if granted.done() and not granted.cancelled():
+                # The slot was handed over just as we were cancelled.
+                self.release()
+            elif (queue := self.waiting.get(owner)) is not None:
+                with suppress(ValueError):
+                    queue.remove(granted)
+                if not queue:
+                    del self.waiting[owner]
+            raise
+
+    def release(self) -> None:
+        while self.waiting:
+            owner, queue = next(iter(self.waiting.items()))
+            granted = queue.popleft()
+            # The owner just served goes to the back of the rotation.
+            del self.waiting[owner]
+            if queue:
+                self.waiting[owner] = queue
+            if not granted.done():
+                granted.set_result(None)
+                return
+        self.free += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "free": self.free,
+            "waiting": sum(len(queue) for queue in self.waiting.values()),
+        }
+
+
+class DeviceLog(logging.LoggerAdapter):
+    """Prefix log lines with the device they concern."""
+
+    def process(self, msg: Any, kwargs: Any) -> tuple[Any, Any]:
+        return f"[{self.extra['device']}] {msg}", kwargs
 
 
 class VoiceHermesBridge:
+    """Models, clients and media serving shared by every connected Voice PE.
+
+    Each host in --device gets a VoiceDevice with its own capture, turn and
+    Hermes session. Whisper, TTS, the audio cache and the announcement
+    server exist once per process; the STT and TTS pools hand their workers
+    to the devices in turn.
+    """
+
     def __init__(self, args: argparse.Namespace) -> None:
         self.args = args
+        self.http = httpx.AsyncClient(timeout=httpx.Timeout(300.0, connect=15.0))
+        # Pre-authenticated and pooled, so a warmed connection is reused by
+        # the next run; HTTP/2 is negotiated over TLS when h2 is installed.
+        # Each device sends its own session header per request.
+        self.hermes = httpx.AsyncClient(
+            base_url=args.hermes_url.rstrip("/"),
+            headers={"Authorization": f"Bearer {args.hermes_key}"},
+            timeout=httpx.Timeout(300.0, connect=15.0),
+            limits=httpx.Limits(
+                max_connections=8,
+                max_keepalive_connections=4,
+                keepalive_expiry=max(60.0, 2 * args.hermes_keepalive),
+            ),
+            http2=importlib.util.find_spec("h2") is not None,
+        )
+        self.hermes_warm: asyncio.Task[None] | None = None
+        self.hermes_keepalive: asyncio.Task[None] | None = None
+        self.announcement = AnnouncementServer(
+            args.http_bind, args.http_port, args.http_base, args.media_ttl
+        )
+        # Set only after the warmup decode, so a non-None model is ready.
+        self.whisper: WhisperModel | None = None
+        self.whisper_lock = threading.Lock()
+        self.whisper_task: asyncio.Future[WhisperModel] | None = None
+        self.stt = FairPool(args.stt_workers)
+        self.tts = FairPool(args.tts_workers)
+        # Characters per second of TTS rendering, averaged across turns.
+        self.tts_rate: float | None = None
+        self.trace_stats = TraceStats()
+        self.audio_cache = AudioCache(
+            args.audio_cache_dir,
+            int(args.audio_cache_memory * 2**20),
+            int(args.audio_cache_disk * 2**20),
+        )
+        # Kept apart from the LRU so they can never be evicted.
+        self.failure_clips: dict[str, bytes] = {}
+        self.prerender: asyncio.Task[None] | None = None
+        self.announcement.stats = self.stats
+        self.devices = [VoiceDevice(self, host, key) for host, key in args.devices]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.trace_stats.summary(),
+            "audio_cache": self.audio_cache.stats(),
+            "stt_pool": self.stt.stats(),
+            "tts_pool": self.tts.stats(),
+            "devices": {
+                device.name: {"connected": device.client is not None}
+                for device in self.devices
+            },
+        }
+
+    def preload_whisper(self) -> asyncio.Future[WhisperModel]:
+        """Start loading Whisper in the background unless it is loaded or loading."""
+        task = self.whisper_task
+        if task is None or (task.done() and self.whisper is None):
+            task = asyncio.ensure_future(asyncio.to_thread(self.load_whisper))
+            task.add_done_callback(self._log_whisper_failure)
+            self.whisper_task = task
+        return task
+
+    @staticmethod
+    def _log_whisper_failure(task: asyncio.Future[WhisperModel]) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            LOG.error("Faster Whisper failed to load", exc_info=task.exception())
+
+    def load_whisper(self) -> WhisperModel:
+        with self.whisper_lock:
+            if self.whisper is not None:
+                return self.whisper
+            started = time.monotonic()
+            LOG.info("loading Faster Whisper model %s", self.args.whisper_model)
+            whisper_options: dict[str, Any] = {
+                "device": "cpu",
+                "compute_type": "int8",
+                # One model copy decodes up to --stt-workers utterances at once.
+                "num_workers": max(1, self.args.stt_workers),
+            }
+            if cache := os.environ.get("VOICE_PE_WHISPER_CACHE"):
+                whisper_options["download_root"] = cache
+            model = WhisperModel(self.args.whisper_model, **whisper_options)
+            # Decode one second of silence without VAD so the encoder and
+            # decoder actually run once before the first real turn.
+            decode_pcm(
+                model, np.zeros(16_000, dtype=np.float32), vad_filter=False, beam_size=1
+            )
+            self.whisper = model
+            LOG.info("Faster Whisper ready in %.1fs", time.monotonic() - started)
+            return model
+
+    def transcribe(self, audio: np.ndarray) -> str:
+        return decode_pcm(self.load_whisper(), audio, vad_filter=True, beam_size=5)
+
+    def warm_hermes(self) -> None:
+        """Open or refresh a pooled Hermes connection without waiting for it."""
+        if self.hermes_warm is None or self.hermes_warm.done():
+            self.hermes_warm = asyncio.create_task(self._warm_hermes())
+
+    async def _warm_hermes(self) -> None:
+        try:
+            response = await self.hermes.get(
+                self.args.hermes_ping_path, timeout=httpx.Timeout(10.0, connect=5.0)
+            )
+            LOG.debug(
+                "Hermes connection warm (%s, HTTP %d)",
+                response.http_version,
+                response.status_code,
+            )
+        except httpx.HTTPError:
+            LOG.debug("Hermes warm-up request failed", exc_info=True)
+
+    async def keep_hermes_warm(self) -> None:
+        while True:
+            self.warm_hermes()
+            await asyncio.sleep(self.args.hermes_keepalive)
+
+    async def fetch_tts(self, text: str, owner: str = "") -> bytes:
+        with trace_span("tts_wait"):
+            await self.tts.acquire(owner)
+        try:
+            with trace_span("tts", chars=len(text)):
+                return await self._fetch_tts(text)
+        finally:
+            self.tts.release()
+
+    async def _fetch_tts(self, text: str) -> bytes:
+        started = time.monotonic()
+        if self.args.tts_url:
+            LOG.info("synthesizing %d characters via %s", len(text), self.args.tts_url)
+            response = await self.http.post(
+                self.args.tts_url,
+                json={"text": text},
+                timeout=httpx.Timeout(180.0, connect=5.0),
+            )
+            response.raise_for_status()
+            wav = response.content
+        else:
+            wav = await run_tts(self.args.tts_command, text)
+        if not wav:
+            raise RuntimeError("TTS returned no audio")
+        rate = len(text) / max(time.monotonic() - started, 1e-3)
+        self.tts_rate = rate if self.tts_rate is None else 0.7 * self.tts_rate + 0.3 * rate
+        return wav
+
+    async def render_cached(
+        self,
+        kind: str,
+        text: str,
+        owner: str,
+        render: Callable[[str, str], Awaitable[bytes]],
+    ) -> bytes:
+        """Render through the audio cache; long, one-off replies bypass it."""
+        if len(text) > AUDIO_CACHE_MAX_CHARS:
+            return await render(text, owner)
+        key = AudioCache.key(
+            self.args.tts_url or self.args.tts_command, self.args.tts_voice, kind, text.strip()
+        )
+        with trace_span("audio_cache", chars=len(text)):
+            data = await self.audio_cache.get(key)
+        if data is None:
+            data = await render(text, owner)
+            await self.audio_cache.put(key, data)
+        return data
+
+    async def synthesize(self, text: str, owner: str = "") -> bytes:
+        return await self.render_cached("flac", text, owner, self._synthesize)
+
+    async def synthesize_pcm(self, text: str, owner: str = "") -> bytes:
+        return await self.render_cached("pcm", text, owner, self._synthesize_pcm)
+
+    async def _synthesize(self, text: str, owner: str) -> bytes:
+        wav = await self.fetch_tts(text, owner)
+        with trace_span("encode", bytes=len(wav)):
+            if (flac := await asyncio.to_thread(encode_flac, wav)) is not None:
+                return flac
+            return await convert_to_flac(wav)
+
+    async def _synthesize_pcm(self, text: str, owner: str) -> bytes:
+        wav = await self.fetch_tts(text, owner)
+        with trace_span("encode", bytes=len(wav)):
+            if (pcm := await asyncio.to_thread(encode_pcm, wav)) is not None:
+                return pcm
+            return await convert_to_pcm(wav)
+
+    async def prerender_failures(self) -> None:
+        for reason, phrase in FAILURE_PHRASES.items():
+            try:
+                self.failure_clips[reason] = await self.synthesize(phrase)
+            except Exception:
+                LOG.warning("could not render failure clip %s", reason, exc_info=True)
+        LOG.info("rendered %d failure clips", len(self.failure_clips))
+
+    async def run(self) -> None:
+        await self.announcement.start()
+        self.preload_whisper()
+        if self.args.speak_failures:
+            self.prerender = asyncio.create_task(self.prerender_failures())
+        if self.args.hermes_keepalive > 0:
+            self.hermes_keepalive = asyncio.create_task(self.keep_hermes_warm())
+        await asyncio.gather(*(device.run() for device in self.devices))
+
+    async def close(self) -> None:
+        for device in self.devices:
+            await device.close()
+        for task in (self.hermes_keepalive, self.hermes_warm, self.prerender):
+            if task is not None:
+                task.cancel()
+        await self.http.aclose()
+        await self.hermes.aclose()
+        await self.announcement.close()
+
+
+class VoiceDevice:
+    """One Voice PE: its API connection, capture, current turn and session."""
+
+    def __init__(self, bridge: VoiceHermesBridge, host: str, key: str) -> None:
+        self.bridge = bridge
+        self.args = bridge.args
+        self.name = host
+        self.key = key
+        self.log = DeviceLog(LOG, {"device": host})
         self.client: aioesphomeapi.APIClient | None = None
         self.unsubscribe: Any = None
-        self.recording = bytearray()
-        self.recording_lock = asyncio.Lock()
-        self.http = httpx.AsyncClient(timeout=httpx.Timeout(300.0, connect=15.0))
-        self.session_id = env("VOICE_PE_HERMES_SESSION_ID", str(uuid.uuid4()))
+        self.capture = CaptureBuffer(self.args.max_capture, self.args.voice_level)
+        session = env("VOICE_PE_HERMES_SESSION_ID", "")
+        if session and len(self.args.devices) > 1:
+            session = f"{session}:{host}"
+        self.session_id = session or str(uuid.uuid4())
         self.active_turn: asyncio.Task[None] | None = None
         self.active_run_id: str | None = None
         self.active_run_lock = asyncio.Lock()
-        self.announcement = AnnouncementServer(
-            args.http_bind, args.http_port, args.http_base
-        )
-        self.whisper: WhisperModel | None = None
+        self.streaming: StreamingTranscript | None = None
+        self.turn_trace: TurnTrace | None = None
         self.disconnected = asyncio.Event()
 
     def event(self, event: VoiceAssistantEventType, **data: str) -> None:
@@ -223,9 +1438,18 @@ class VoiceHermesBridge:
         wake_word: str | None,
     ) -> int:
         del conversation_id, flags, audio_settings, wake_word
+        self.turn_trace = TurnTrace(self.name)
+        # The connection opens while the user is still speaking.
+        self.bridge.warm_hermes()
         await self.interrupt_active_turn()
-        async with self.recording_lock:
-            self.recording.clear()
+        self.capture.start()
+        if self.streaming is not None:
+            self.streaming.abort()
+            self.streaming = None
+        if self.args.stt_step > 0:
+            self.streaming = StreamingTranscript(
+                self, self.capture, self.args.stt_step, self.args.stt_holdback
+            )
         self.event(VoiceAssistantEventType.VOICE_ASSISTANT_RUN_START)
         self.event(VoiceAssistantEventType.VOICE_ASSISTANT_STT_START)
         # Port zero tells ESPHome to use the encrypted API-audio stream.
@@ -233,125 +1457,221 @@ class VoiceHermesBridge:
 
     async def handle_audio(self, data: bytes, data2: bytes | None) -> None:
         del data2
-        async with self.recording_lock:
-            self.recording.extend(data)
+        self.capture.append(data)
 
     async def handle_stop(self, _aborted: bool) -> None:
         self.event(VoiceAssistantEventType.VOICE_ASSISTANT_STT_END)
-        async with self.recording_lock:
-            pcm = bytes(self.recording)
-            self.recording.clear()
-        if not pcm:
-            self.fail("empty-audio")
+        # The turn reads the capture in place; it is reset by the next
+        # handle_start, after this turn has been interrupted.
+        self.capture.stop()
+        streaming, self.streaming = self.streaming, None
+        trace, self.turn_trace = self.turn_trace or TurnTrace(self.name), None
+        trace.add_span(
+            "capture",
+            trace.started,
+            time.monotonic(),
+            audio_seconds=round(len(self.capture) / 32_000, 2),
+        )
+        trace.mark("capture_end")
+        if not len(self.capture):
+            if streaming is not None:
+                streaming.abort()
+            self.finish_trace(trace, "empty-audio")
+            self.active_turn = asyncio.create_task(self.fail("empty-audio"))
             return
-        self.active_turn = asyncio.create_task(self.process_recording(pcm))
+        self.active_turn = asyncio.create_task(
+            self.process_recording(self.capture, streaming, trace)
+        )
 
     async def handle_disconnect(self, _expected: bool) -> None:
         self.disconnected.set()
 
-    async def process_recording(self, pcm: bytes) -> None:
+    async def decode(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a Whisper decode on the shared STT pool when this device's turn comes."""
+        with trace_span("stt_wait"):
+            await self.bridge.stt.acquire(self.name)
         try:
-            text = await asyncio.to_thread(self.transcribe, pcm)
+            return await asyncio.to_thread(func, *args, **kwargs)
+        finally:
+            self.bridge.stt.release()
+
+    async def process_recording(
+        self,
+        capture: CaptureBuffer,
+        streaming: StreamingTranscript | None = None,
+        trace: TurnTrace | None = None,
+    ) -> None:
+        trace = trace or TurnTrace(self.name)
+        TRACE.set(trace)
+        outcome = "bridge-error"
+        try:
+            # A turn that arrives mid-load waits for that load, not a second one.
+            with trace.span("whisper_wait"):
+                await asyncio.shield(self.bridge.preload_whisper())
+            start, end = (
+                capture.voiced(self.args.trim_padding)
+                if self.args.trim_silence
+                else (capture.oldest, len(capture))
+            )
+            with trace.span(
+                "stt",
+                streaming=streaming is not None,
+                audio_seconds=round((end - start) / 32_000, 2),
+            ):
+                if streaming is not None:
+                    text = await streaming.finish(end)
+                else:
+                    text = await self.decode(
+                        self.bridge.transcribe, capture.samples(start, end)
+                    )
             if not text:
-                self.fail("no-speech")
+                outcome = "no-speech"
+                await self.fail(outcome)
                 return
-            LOG.info("transcript: %s", text)
+            self.log.info("transcript: %s", text)
             self.event(VoiceAssistantEventType.VOICE_ASSISTANT_INTENT_START)
-            spoken = False
-            async for sentence in self.stream_hermes(text):
-                spoken = True
-                await self.speak(sentence)
+            spoken = await self.speak(self.stream_hermes(text))
             self.event(VoiceAssistantEventType.VOICE_ASSISTANT_INTENT_END)
             if not spoken:
-                self.fail("empty-hermes-response")
+                outcome = "empty-hermes-response"
+                await self.fail(outcome)
                 return
             self.event(VoiceAssistantEventType.VOICE_ASSISTANT_RUN_END)
+            outcome = "ok"
         except asyncio.CancelledError:
-            LOG.info("voice turn interrupted")
+            outcome = "interrupted"
+            self.log.info("voice turn interrupted")
         except Exception:
-            LOG.exception("voice turn failed")
-            self.fail("bridge-error")
+            self.log.exception("voice turn failed")
+            await self.fail("bridge-error")
+        finally:
+            self.finish_trace(trace, outcome)
 
-    def transcribe(self, pcm: bytes) -> str:
-        if self.whisper is None:
-            LOG.info("loading Faster Whisper model %s", self.args.whisper_model)
-            whisper_options: dict[str, Any] = {
-                "device": "cpu",
-                "compute_type": "int8",
-            }
-            if cache := os.environ.get("VOICE_PE_WHISPER_CACHE"):
-                whisper_options["download_root"] = cache
-            self.whisper = WhisperModel(self.args.whisper_model, **whisper_options)
-        with tempfile.TemporaryDirectory(prefix="voice-pe-stt-") as directory:
-            path = Path(directory) / "input.wav"
-            write_pcm_wav(path, pcm)
-            segments, _ = self.whisper.transcribe(
-                str(path), language="en", vad_filter=True, beam_size=5
-            )
-            return " ".join(segment.text.strip() for segment in segments).strip()
-
-    async def stream_hermes(self, text: str) -> AsyncIterator[str]:
-        response = await self.http.post(
-            f"{self.args.hermes_url.rstrip('/')}/v1/runs",
-            headers={
-                "Authorization": f"Bearer {self.args.hermes_key}",
-                "Content-Type": "application/json",
-                "X-Hermes-Session-Id": self.session_id,
-            },
-            json={
-                "input": f"{self.args.voice_instruction}\n\nUser request: {text}",
-                "session_id": self.session_id,
-            },
+    def finish_trace(self, trace: TurnTrace, outcome: str) -> None:
+        record = trace.record(outcome)
+        self.bridge.trace_stats.add(record)
+        self.log.info(
+            "turn %s %s in %.2fs (response %s)",
+            trace.turn_id,
+            outcome,
+            record["total"],
+            f"{record['response']:.2f}s" if "response" in record else "n/a",
         )
-        response.raise_for_status()
-        run_id = str(response.json()["run_id"])
+        if self.args.trace_file:
+            try:
+                with open(self.args.trace_file, "a", encoding="utf-8") as file:
+                    file.write(json.dumps(record) + "\n")
+            except OSError:
+                self.log.warning("could not write turn trace", exc_info=True)
+
+    async def set_active_run(self, run_id: str) -> None:
+        if (trace := TRACE.get()) is not None:
+            trace.run_id = run_id
         async with self.active_run_lock:
             self.active_run_id = run_id
-        LOG.info("Hermes run started: %s", run_id)
+        self.log.info("Hermes run started: %s", run_id)
 
-        buffer = ""
-        pending = ""
-        output = ""
+    async def hermes_events(self, text: str) -> AsyncGenerator[dict[str, Any], None]:
+        """Create a Hermes run and yield its event payloads.
+
+        With --hermes-create-stream the run is requested as an event stream
+        directly; servers that answer with the usual JSON run id are followed
+        up with the separate events request.
+        """
+        body: dict[str, Any] = {
+            "input": f"{self.args.voice_instruction}\n\nUser request: {text}",
+            "session_id": self.session_id,
+        }
+        headers = {
+            "Content-Type": "application/json",
+            "X-Hermes-Session-Id": self.session_id,
+        }
+        if self.args.hermes_create_stream:
+            body["stream"] = True
+            headers["Accept"] = "text/event-stream, application/json"
+        run_id: str | None = None
+        trace = TRACE.get()
+        started = time.monotonic()
+        first_token = False
+        hermes = self.bridge.hermes
         try:
-            async with self.http.stream(
+            async with hermes.stream(
+                "POST", "/v1/runs", json=body, headers=headers
+            ) as response:
+                response.raise_for_status()
+                if response.headers.get("content-type", "").startswith("text/event-stream"):
+                    async for payload in iter_sse(response):
+                        if run_id is None and payload.get("run_id"):
+                            run_id = str(payload["run_id"])
+                            await self.set_active_run(run_id)
+                        if trace is not None and not first_token:
+                            first_token = payload.get("event") == "message.delta"
+                            if first_token:
+                                trace.add_span("hermes_first_token", started, time.monotonic())
+                        yield payload
+                    return
+                await response.aread()
+                run_id = str(response.json()["run_id"])
+            await self.set_active_run(run_id)
+            async with hermes.stream(
                 "GET",
-                f"{self.args.hermes_url.rstrip('/')}/v1/runs/{run_id}/events",
+                f"/v1/runs/{run_id}/events",
                 headers={
-                    "Authorization": f"Bearer {self.args.hermes_key}",
                     "Accept": "text/event-stream",
                     "X-Hermes-Session-Id": self.session_id,
                 },
             ) as events:
                 events.raise_for_status()
-                async for line in events.aiter_lines():
-                    if not line.startswith("data: "):
-                        continue
-                    payload = json.loads(line[6:])
-                    event = payload.get("event")
-                    if event == "message.delta":
-                        delta = str(payload.get("delta") or "")
-                        output += delta
-                        buffer += delta
-                        chunks, buffer = extract_voice_chunks(buffer)
-                        for chunk in chunks:
-                            pending = f"{pending} {chunk}".strip()
-                            if len(pending) >= VOICE_CHUNK_MIN_CHARS:
-                                yield pending
-                                pending = ""
-                    elif event == "run.completed":
-                        completed = str(payload.get("output") or "")
-                        if completed and not output:
-                            buffer = completed
-                        chunks, buffer = extract_voice_chunks(buffer, flush=True)
-                        for chunk in chunks:
-                            pending = f"{pending} {chunk}".strip()
-                        break
+                async for payload in iter_sse(events):
+                    if trace is not None and not first_token:
+                        first_token = payload.get("event") == "message.delta"
+                        if first_token:
+                            trace.add_span("hermes_first_token", started, time.monotonic())
+                    yield payload
         finally:
+            if trace is not None:
+                trace.add_span("hermes", started, time.monotonic())
             async with self.active_run_lock:
-                if self.active_run_id == run_id:
+                if run_id is not None and self.active_run_id == run_id:
                     self.active_run_id = None
-        if buffer.strip():
-            pending = f"{pending} {buffer.strip()}".strip()
+
+    async def stream_hermes(self, text: str) -> AsyncGenerator[str, None]:
+        segmenter = VoiceSegmenter()
+        policy = ChunkPolicy()
+        pending = ""
+        streamed = False
+        async with aclosing(self.hermes_events(text)) as events:
+            async for payload in events:
+                event = payload.get("event")
+                if event == "message.delta":
+                    streamed = True
+                    delta = str(payload.get("delta") or "")
+                    policy.arrive(delta)
+                    chunks = segmenter.feed(delta)
+                elif event == "run.completed":
+                    completed = str(payload.get("output") or "")
+                    policy.complete = True
+                    chunks = [] if streamed else segmenter.feed(completed)
+                    chunks += segmenter.flush()
+                else:
+                    continue
+                for chunk in chunks:
+                    pending = f"{pending} {chunk}".strip()
+                    if policy.ready(pending):
+                        yield pending
+                        policy.emitted(pending, self.bridge.tts_rate)
+                        pending = ""
+                if policy.chunks == 0 and event == "message.delta":
+                    clause = segmenter.take_clause(
+                        VOICE_CLAUSE_MIN_CHARS, self.args.first_chunk_words
+                    )
+                    if clause:
+                        yield clause
+                        policy.emitted(clause, self.bridge.tts_rate)
+                if event == "run.completed":
+                    break
+        for chunk in segmenter.flush():
+            pending = f"{pending} {chunk}".strip()
         if pending:
             yield pending
 
@@ -364,60 +1684,162 @@ class VoiceHermesBridge:
             run_id = self.active_run_id
         if run_id:
             try:
-                response = await self.http.post(
-                    f"{self.args.hermes_url.rstrip('/')}/v1/runs/{run_id}/stop",
-                    headers={
-                        "Authorization": f"Bearer {self.args.hermes_key}",
-                        "X-Hermes-Session-Id": self.session_id,
-                    },
+                response = await self.bridge.hermes.post(
+                    f"/v1/runs/{run_id}/stop",
                     timeout=httpx.Timeout(15.0, connect=5.0),
                 )
                 response.raise_for_status()
-                LOG.info("stopped Hermes run %s", run_id)
+                self.log.info("stopped Hermes run %s", run_id)
             except Exception:
-                LOG.warning("could not stop Hermes run %s", run_id, exc_info=True)
+                self.log.warning("could not stop Hermes run %s", run_id, exc_info=True)
         task.cancel()
         with suppress(asyncio.CancelledError):
             await task
         self.active_turn = None
 
-    async def speak(self, text: str) -> None:
-        with tempfile.TemporaryDirectory(prefix="voice-pe-tts-") as directory:
-            root = Path(directory)
-            wav_path = root / "reply.wav"
-            flac_path = root / "reply.flac"
-            await run_tts(self.args.tts_command, text, wav_path)
-            await convert_to_flac(wav_path, flac_path)
-            media_path, media_url = self.announcement.add(flac_path.read_bytes())
+    async def render(self, text: str) -> bytes:
+        return await self.bridge.synthesize(text, self.name)
+
+    async def render_pcm(self, text: str) -> bytes:
+        return await self.bridge.synthesize_pcm(text, self.name)
+
+    def fetch_observer(self) -> Callable[[], None]:
+        """Callback recording when the device fetches media requested now."""
+        trace = TRACE.get()
+        requested = time.monotonic()
+
+        def fetched() -> None:
+            if trace is not None:
+                trace.add_span("device_fetch", requested, time.monotonic())
+                trace.mark("first_audio")
+
+        return fetched
+
+    async def request_announcement(self, media_url: str) -> None:
+        with trace_span("playback"):
+            result = await self.client.send_voice_assistant_announcement_await_response(
+                media_url, timeout=300, text=""
+            )
+        if not result.success:
+            raise RuntimeError("Voice PE reported announcement failure")
+        self.log.info("Voice PE announcement completed successfully")
+
+    async def announce(self, data: bytes) -> None:
+        media_path, media_url = self.bridge.announcement.add(data, self.fetch_observer())
+        try:
+            self.log.info("requesting Voice PE announcement: %d bytes", len(data))
+            await self.request_announcement(media_url)
+        finally:
+            self.bridge.announcement.remove(media_path)
+
+    async def speak(self, sentences: AsyncGenerator[str, None]) -> int:
+        """Speak the reply; returns the number of sentences spoken."""
+        if self.args.stream_announcements:
+            return await self.speak_streamed(sentences)
+        return await self.pipeline(sentences, self.render, self.announce)
+
+    async def speak_streamed(self, sentences: AsyncGenerator[str, None]) -> int:
+        """Play the whole reply as one announcement of a growing FLAC stream.
+
+        The device is pointed at the stream as soon as the first sentence is
+        encoded and keeps playing while later sentences are synthesized.
+        """
+        media = MediaStream()
+        encoder = FlacStreamEncoder(media)
+        media_path, media_url = self.bridge.announcement.add(media)
+        playback: asyncio.Task[None] | None = None
+
+        async def play(pcm: bytes) -> None:
+            nonlocal playback
+            if playback is not None and playback.done():
+                playback.result()  # surface an early playback failure
+            await encoder.write(pcm)
+            if playback is None:
+                self.log.info("requesting streamed Voice PE announcement")
+                self.bridge.announcement.on_fetch[media_path] = self.fetch_observer()
+                playback = asyncio.create_task(self.request_announcement(media_url))
+
+        try:
+            await encoder.start()
+            spoken = await self.pipeline(sentences, self.render_pcm, play)
+            await encoder.finish()
+            if playback is not None:
+                await playback
+            return spoken
+        finally:
+            if playback is not None and not playback.done():
+                playback.cancel()
+                with suppress(asyncio.CancelledError):
+                    await playback
+            await encoder.abort()
+            self.bridge.announcement.remove(media_path)
+
+    async def pipeline(
+        self,
+        sentences: AsyncGenerator[str, None],
+        render: Callable[[str], Awaitable[bytes]],
+        play: Callable[[bytes], Awaitable[None]],
+    ) -> int:
+        """Play rendered sentences in order while the following ones render.
+
+        A producer renders up to --tts-lookahead sentences ahead of the one
+        currently playing. Returns the number of sentences played.
+        """
+        queue: asyncio.Queue[asyncio.Task[bytes] | None] = asyncio.Queue()
+        slots = asyncio.Semaphore(max(1, self.args.tts_lookahead))
+        rendering: list[asyncio.Task[bytes]] = []
+
+        async def produce() -> None:
             try:
-                LOG.info("requesting Voice PE announcement: %d bytes", flac_path.stat().st_size)
-                result = await self.client.send_voice_assistant_announcement_await_response(
-                    media_url, timeout=300, text=""
-                )
-                if not result.success:
-                    raise RuntimeError("Voice PE reported announcement failure")
-                LOG.info("Voice PE announcement completed successfully")
+                async with aclosing(sentences) as stream:
+                    async for sentence in stream:
+                        await slots.acquire()
+                        task = asyncio.create_task(render(sentence))
+                        rendering.append(task)
+                        queue.put_nowait(task)
             finally:
-                self.announcement.remove(media_path)
+                queue.put_nowait(None)
 
-    def fail(self, reason: str) -> None:
-        LOG.warning("voice turn failed: %s", reason)
+        producer = asyncio.create_task(produce())
+        spoken = 0
+        try:
+            while (task := await queue.get()) is not None:
+                data = await task
+                # Free the slot before playback so the next sentence renders meanwhile.
+                slots.release()
+                await play(data)
+                spoken += 1
+            await producer
+        finally:
+            producer.cancel()
+            for task in rendering:
+                task.cancel()
+            await asyncio.gather(producer, *rendering, return_exceptions=True)
+        return spoken
+
+    async def fail(self, reason: str) -> None:
+        self.log.warning("voice turn failed: %s", reason)
         self.event(VoiceAssistantEventType.VOICE_ASSISTANT_ERROR, code=reason)
         self.event(VoiceAssistantEventType.VOICE_ASSISTANT_RUN_END)
+        # Only a clip rendered in advance is played; failing never waits on TTS.
+        if (clip := self.bridge.failure_clips.get(reason)) is not None:
+            try:
+                await self.announce(clip)
+            except Exception:
+                self.log.warning("could not play failure clip %s", reason, exc_info=True)
 
     async def run(self) -> None:
-        await self.announcement.start()
         while True:
             try:
                 self.client = aioesphomeapi.APIClient(
-                    self.args.device,
+                    self.name,
                     6053,
-                    noise_psk=self.args.voice_pe_key,
+                    noise_psk=self.key,
                     client_info="nixstation voice-pe-hermes-bridge",
                 )
                 self.disconnected.clear()
                 await self.client.connect(on_stop=self.handle_disconnect, login=True)
-                LOG.info("connected to Voice PE %s", self.args.device)
+                self.log.info("connected to Voice PE")
                 self.unsubscribe = self.client.subscribe_voice_assistant(
                     handle_start=self.handle_start,
                     handle_stop=self.handle_stop,
@@ -427,7 +1849,7 @@ class VoiceHermesBridge:
             except asyncio.CancelledError:
                 raise
             except Exception:
-                LOG.exception("Voice PE connection failed; retrying")
+                self.log.exception("Voice PE connection failed; retrying")
             finally:
                 if self.unsubscribe is not None:
                     self.unsubscribe()
@@ -439,23 +1861,112 @@ class VoiceHermesBridge:
 
     async def close(self) -> None:
         await self.interrupt_active_turn()
+        if self.streaming is not None:
+            self.streaming.abort()
         if self.unsubscribe is not None:
             self.unsubscribe()
         if self.client is not None:
             await self.client.disconnect(force=True)
-        await self.http.aclose()
-        await self.announcement.close()
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser()
-    parser.add_argument("--device", default=env("VOICE_PE_DEVICE", "lore-voice-pe.local"))
+    parser.add_argument(
+        "--device",
+        default=env("VOICE_PE_DEVICE", "lore-voice-pe.local"),
+        help="comma-separated Voice PE hosts served by this bridge; a host may be "
+        "given as HOST=KEY_FILE, otherwise it uses --voice-pe-key",
+    )
     parser.add_argument("--voice-pe-key")
     parser.add_argument(
         "--hermes-url", default=env("VOICE_PE_HERMES_URL", "http://nomad.coin-noodlefish.ts.net:8643")
     )
     parser.add_argument("--hermes-key")
+    parser.add_argument(
+        "--hermes-keepalive",
+        type=float,
+        default=float(env("VOICE_PE_HERMES_KEEPALIVE", "20")),
+        help="seconds between requests that keep the Hermes connection warm; 0 disables",
+    )
+    parser.add_argument(
+        "--hermes-ping-path",
+        default=env("VOICE_PE_HERMES_PING_PATH", "/v1/models"),
+        help="cheap authenticated Hermes path used to open and keep the connection",
+    )
+    parser.add_argument(
+        "--hermes-create-stream",
+        action=argparse.BooleanOptionalAction,
+        default=env("VOICE_PE_HERMES_CREATE_STREAM", "0") == "1",
+        help="ask POST /v1/runs to stream events directly instead of a second request",
+    )
     parser.add_argument("--whisper-model", default=env("VOICE_PE_WHISPER_MODEL", "base"))
+    parser.add_argument(
+        "--stt-step",
+        type=float,
+        default=float(env("VOICE_PE_STT_STEP", "1.0")),
+        help="seconds of new audio between partial decodes while capturing; 0 disables",
+    )
+    parser.add_argument(
+        "--stt-holdback",
+        type=float,
+        default=float(env("VOICE_PE_STT_HOLDBACK", "1.0")),
+        help="partial segments ending this close to the live edge are not committed",
+    )
+    parser.add_argument(
+        "--stt-workers",
+        type=int,
+        default=int(env("VOICE_PE_STT_WORKERS", "1")),
+        help="Whisper decodes run at once, shared fairly by all devices",
+    )
+    parser.add_argument(
+        "--tts-workers",
+        type=int,
+        default=int(env("VOICE_PE_TTS_WORKERS", "1")),
+        help="TTS renders run at once, shared fairly by all devices",
+    )
+    parser.add_argument(
+        "--tts-lookahead",
+        type=int,
+        default=int(env("VOICE_PE_TTS_LOOKAHEAD", "2")),
+        help="sentences synthesized ahead of the one currently playing",
+    )
+    parser.add_argument(
+        "--first-chunk-words",
+        type=int,
+        default=int(env("VOICE_PE_FIRST_CHUNK_WORDS", "8")),
+        help="speak the first chunk after this many words if no clause break came; 0 disables",
+    )
+    parser.add_argument(
+        "--stream-announcements",
+        action=argparse.BooleanOptionalAction,
+        default=env("VOICE_PE_STREAM_ANNOUNCEMENTS", "0") == "1",
+        help="play the whole reply as one chunked FLAC stream that starts "
+        "with the first sentence",
+    )
+    parser.add_argument(
+        "--max-capture",
+        type=float,
+        default=float(env("VOICE_PE_MAX_CAPTURE", "30")),
+        help="seconds of audio kept per utterance; older audio is overwritten",
+    )
+    parser.add_argument(
+        "--trim-silence",
+        action=argparse.BooleanOptionalAction,
+        default=env("VOICE_PE_TRIM_SILENCE", "1") == "1",
+        help="send Whisper only the voiced part of the capture plus padding",
+    )
+    parser.add_argument(
+        "--trim-padding",
+        type=float,
+        default=float(env("VOICE_PE_TRIM_PADDING", "0.4")),
+        help="seconds kept before the first and after the last voiced packet",
+    )
+    parser.add_argument(
+        "--voice-level",
+        type=float,
+        default=float(env("VOICE_PE_VOICE_LEVEL", "300")),
+        help="RMS level (16-bit units) at which a packet counts as voiced",
+    )
     parser.add_argument(
         "--voice-instruction",
         default=env(
@@ -471,14 +1982,68 @@ def parse_args() -> argparse.Namespace:
         default=env("VOICE_PE_TTS_COMMAND", "voice-pe-espeak-tts"),
         help="executable plus optional args; it receives --output PATH TEXT",
     )
+    parser.add_argument(
+        "--tts-url",
+        default=env("VOICE_PE_TTS_URL", ""),
+        help="HTTP endpoint taking {\"text\": ...} and returning WAV; "
+        "used instead of --tts-command when set",
+    )
+    parser.add_argument(
+        "--tts-voice",
+        default=env("VOICE_PE_TTS_VOICE", ""),
+        help="label for the TTS voice; part of the audio cache key, so changing "
+        "it invalidates cached clips",
+    )
+    parser.add_argument(
+        "--audio-cache-dir",
+        default=env("VOICE_PE_AUDIO_CACHE_DIR", ""),
+        help="directory for rendered phrases; empty caches in memory only",
+    )
+    parser.add_argument(
+        "--audio-cache-memory",
+        type=float,
+        default=float(env("VOICE_PE_AUDIO_CACHE_MEMORY", "32")),
+        help="MiB of rendered phrases kept in memory",
+    )
+    parser.add_argument(
+        "--audio-cache-disk",
+        type=float,
+        default=float(env("VOICE_PE_AUDIO_CACHE_DISK", "256")),
+        help="MiB of rendered phrases kept in --audio-cache-dir",
+    )
+    parser.add_argument(
+        "--speak-failures",
+        action=argparse.BooleanOptionalAction,
+        default=env("VOICE_PE_SPEAK_FAILURES", "1") == "1",
+        help="play a short pre-rendered phrase when a turn fails",
+    )
     parser.add_argument("--http-bind", default=env("VOICE_PE_HTTP_BIND", "0.0.0.0"))
     parser.add_argument("--http-port", type=int, default=int(env("VOICE_PE_HTTP_PORT", "8798")))
     parser.add_argument(
         "--http-base", default=env("VOICE_PE_HTTP_BASE", "http://192.168.7.29:8798")
     )
-    args = parser.parse_args()
-    if args.voice_pe_key is None:
+    parser.add_argument(
+        "--trace-file",
+        default=env("VOICE_PE_TRACE_FILE", ""),
+        help="append one JSON line of span timings per voice turn; "
+        "rolling p50/p95 are served at /stats",
+    )
+    parser.add_argument(
+        "--media-ttl",
+        type=float,
+        default=float(env("VOICE_PE_MEDIA_TTL", "120")),
+        help="seconds an announcement path may go unfetched before it is dropped",
+    )
+    args = parser.parse_args(argv)
+    devices: list[tuple[str, str | None]] = []
+    for spec in filter(None, (part.strip() for part in args.device.split(","))):
+        host, _, key_file = spec.partition("=")
+        devices.append((host, read_secret(key_file) if key_file else None))
+    if not devices:
+        parser.error("--device names no Voice PE")
+    if args.voice_pe_key is None and any(key is None for _, key in devices):
         args.voice_pe_key = read_secret(env("VOICE_PE_KEY_FILE", ""))
+    args.devices = [(host, key or args.voice_pe_key) for host, key in devices]
     if args.hermes_key is None:
         args.hermes_key = read_secret(env("VOICE_PE_HERMES_KEY_FILE", ""))
     return args
@@ -9,11 +9,11 @@ each Hermes turn does not pay the 15-20 second model-load cost again.
 from __future__ import annotations
 
 import argparse
+import io
 import json
 import logging
 import os
 import sys
-import tempfile
 import threading
 import urllib.error
 import urllib.request
@@ -107,7 +107,7 @@ class Synthesizer:
         self.lock = threading.Lock()
         LOG.info("NeuTTS ready at %d Hz using %s", self.model.sample_rate, model_path)
 
-    def synthesize(self, text: str, output: Path) -> None:
+    def synthesize(self, text: str) -> bytes:
         with self.lock:
             chunks = [
                 self.np.asarray(chunk, dtype=self.np.float32)
@@ -118,8 +118,9 @@ class Synthesizer:
             if not chunks:
                 raise RuntimeError("NeuTTS returned no audio chunks")
             audio = self.np.concatenate(chunks)
-            self.sf.write(output, audio, self.model.sample_rate, subtype="PCM_16")
-        output.chmod(0o600)
+        output = io.BytesIO()
+        self.sf.write(output, audio, self.model.sample_rate, format="WAV", subtype="PCM_16")
+        return output.getvalue()
 
 
 class Handler(BaseHTTPRequestHandler):
@@ -135,13 +136,7 @@ class Handler(BaseHTTPRequestHandler):
             text = str(payload.get("text") or "").strip()
             if not text:
                 raise ValueError("text is empty")
-            with tempfile.NamedTemporaryFile(prefix="voice-pe-neutts-", suffix=".wav", delete=False) as file:
-                output = Path(file.name)
-            try:
-                self.synthesizer.synthesize(text, output)
-                data = output.read_bytes()
-            finally:
-                output.unlink(missing_ok=True)
+            data = self.synthesizer.synthesize(text)
             self.send_response(200)
             self.send_header("Content-Type", "audio/wav")
             self.send_header("Content-Length", str(len(data)))